@@ -4,48 +4,201 @@ Query executor for SimpleDB.
 Executes parsed SQL commands on the storage engine.
 """
 
-from typing import Dict, Any, List, Optional
+import heapq
+from collections import OrderedDict
+from contextlib import contextmanager
+from operator import itemgetter, methodcaller
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
 from .parser import Parser
-from .storage import Database
+from .storage import Database, NULL_SORT_KEYS
 from .exceptions import SimpleDBException
 
 
+# Estimated selectivity of a predicate by operator (lower runs first);
+# equality on a PRIMARY KEY / UNIQUE column ranks ahead of all of these
+PREDICATE_RANK = {
+    '=': 1,
+    '<': 2,
+    '<=': 2,
+    '>': 2,
+    '>=': 2,
+    '!=': 3,
+}
+
+
+class RowView:
+    """Read-only sequence of row dicts built on demand from columnar SELECT data."""
+    
+    __slots__ = ('columns', 'data')
+    
+    def __init__(self, columns: List[str], data: List[List[Any]]):
+        self.columns = columns
+        self.data = data
+    
+    def __len__(self) -> int:
+        return len(self.data[0]) if self.data else 0
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return dict(zip(self.columns, [values[index] for values in self.data]))
+    
+    def __iter__(self):
+        columns = self.columns
+        for values in zip(*self.data):
+            yield dict(zip(columns, values))
+
+
 class QueryExecutor:
     """Executes SQL queries on a database."""
     
+    # Maximum number of parsed statements kept in the plan cache
+    PLAN_CACHE_SIZE = 256
+    
     def __init__(self, database: Database):
         self.db = database
         self.parser = Parser()
+        self._plan_cache = OrderedDict()  # sql -> parsed command
+        self._autocommit = True  # save after every modifying statement
+        self._dirty = False  # unsaved changes pending
+        self._dispatch = {
+            'CREATE': self._execute_create,
+            'DROP': self._execute_drop,
+            'INSERT': self._execute_insert,
+            'SELECT': self._execute_select,
+            'UPDATE': self._execute_update,
+            'DELETE': self._execute_delete,
+        }
+    
+    def prepare(self, sql: str) -> Dict[str, Any]:
+        """Parse a SQL statement, reusing the cached plan for repeated SQL."""
+        # Surrounding whitespace and the closing semicolon don't change the
+        # statement, so e.g. "SELECT ...;" and "SELECT ..." share a plan
+        key = sql.strip()
+        if key.endswith(';'):
+            key = key[:-1].rstrip()
+        
+        command = self._plan_cache.get(key)
+        if command is not None:
+            self._plan_cache.move_to_end(key)
+            return command
+        
+        command = self.parser.parse(sql)
+        self._plan_cache[key] = command
+        if len(self._plan_cache) > self.PLAN_CACHE_SIZE:
+            self._plan_cache.popitem(last=False)
+        return command
+    
+    def clear_plan_cache(self):
+        """Discard all cached plans."""
+        # Statement templates carry plans too (see _plan_holder)
+        self._plan_cache.clear()
+        self.parser.clear_compiled()
     
-    def execute(self, sql: str) -> Dict[str, Any]:
-        """Execute a SQL statement and return results."""
+    @contextmanager
+    def transaction(self):
+        """Defer saving until the block exits, then save once if anything changed."""
+        previous = self._autocommit
+        self._autocommit = False
         try:
-            # Parse SQL
-            command = self.parser.parse(sql)
-            
-            # Execute based on command type
-            cmd_type = command['command']
-            
-            if cmd_type == 'CREATE':
-                return self._execute_create(command)
-            elif cmd_type == 'DROP':
-                return self._execute_drop(command)
-            elif cmd_type == 'INSERT':
-                return self._execute_insert(command)
-            elif cmd_type == 'SELECT':
-                return self._execute_select(command)
-            elif cmd_type == 'UPDATE':
-                return self._execute_update(command)
-            elif cmd_type == 'DELETE':
-                return self._execute_delete(command)
-            else:
-                return {'success': False, 'error': f"Unknown command: {cmd_type}"}
+            yield self
+        finally:
+            self._autocommit = previous
+            if previous and self._dirty:
+                self.db.save()
+                self._dirty = False
+    
+    def _save(self):
+        """Record a change and save it, unless inside a transaction."""
+        self._dirty = True
+        if self._autocommit:
+            self.db.save()
+            self._dirty = False
+    
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None,
+                columnar: bool = False) -> Dict[str, Any]:
+        """Execute a SQL statement and return results.
+        
+        With `params`, the statement is a template whose ? placeholders are
+        bound to the given values in order. With `columnar`, a SELECT
+        returns one list per column under 'data' instead of row dicts
+        under 'rows' (wrap it in RowView to iterate rows).
+        
+        A SELECT result's lists belong to the caller, but the row dicts in
+        them may be shared with the table and later results, so they must
+        not be modified.
+        """
+        return self.result_or_error(self.execute_unchecked, sql, params, columnar)
+    
+    def execute_many(self, statements: Sequence[str]) -> List[Dict[str, Any]]:
+        """Execute several SQL statements, saving once at the end."""
+        with self.transaction():
+            return [self.execute(sql) for sql in statements]
+    
+    def execute_batch_insert(self, sql: str, param_rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+        """Insert one row per parameter list of an INSERT template, as one batch.
+        
+        The template is parsed once and the rows reach the table together,
+        so remote storage writes them in a single round trip.
+        """
+        return self.result_or_error(self._execute_batch_insert, sql, param_rows)
+    
+    @staticmethod
+    def result_or_error(run: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+        """Call `run(*args)`, reporting errors as a failed result like execute() does.
         
+        Lets callers of execute_unchecked handle some exceptions themselves
+        and still return the same error shape.
+        """
+        try:
+            return run(*args)
         except SimpleDBException as e:
             return {'success': False, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Unexpected error: {str(e)}"}
     
+    def _execute_batch_insert(self, sql: str, param_rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+        """Insert a batch of bound INSERT rows, letting errors propagate."""
+        bind = self.parser.compile(sql)
+        table = None
+        ignore_conflicts = False
+        rows = []
+        for params in param_rows:
+            command = bind(params)
+            if command['command'] != 'INSERT':
+                return {'success': False, 'error': 'Batch insert needs an INSERT statement'}
+            table = self.db.get_table(command['table'])
+            ignore_conflicts = command.get('ignore_conflicts', False)
+            row, error = self._insert_values(table, command)
+            if error:
+                return {'success': False, 'error': error}
+            rows.append(row)
+        
+        inserted = table.insert_rows(rows, ignore_conflicts) if rows else []
+        if inserted:
+            self._save()
+        return {
+            'success': True,
+            'message': f"{len(inserted)} row(s) inserted"
+        }
+    
+    def execute_unchecked(self, sql: str, params: Optional[Sequence[Any]] = None,
+                          columnar: bool = False) -> Dict[str, Any]:
+        """Execute a SQL statement, letting errors propagate as exceptions."""
+        if params is not None:
+            # Templates are parsed once; each call only binds the values
+            command = self.parser.compile(sql)(params)
+        else:
+            # Parse SQL (or reuse the cached plan)
+            command = self.prepare(sql)
+        
+        # Execute based on command type
+        cmd_type = command['command']
+        if columnar and cmd_type == 'SELECT':
+            return self._execute_select(command, columnar=True)
+        handler = self._dispatch.get(cmd_type)
+        if handler is None:
+            return {'success': False, 'error': f"Unknown command: {cmd_type}"}
+        return handler(command)
+    
     def _execute_create(self, command: Dict[str, Any]) -> Dict[str, Any]:
         """Execute CREATE TABLE command."""
         table_name = command['table']
@@ -59,7 +212,10 @@ class QueryExecutor:
             }
         
         self.db.create_table(table_name, columns)
-        self.db.save()
+        self._save()
+        
+        # Schema changed - cached plans may be stale
+        self.clear_plan_cache()
         
         return {
             'success': True,
@@ -71,7 +227,10 @@ class QueryExecutor:
         table_name = command['table']
         
         self.db.drop_table(table_name)
-        self.db.save()
+        self._save()
+        
+        # Schema changed - cached plans may be stale
+        self.clear_plan_cache()
         
         return {
             'success': True,
@@ -80,62 +239,139 @@ class QueryExecutor:
     
     def _execute_insert(self, command: Dict[str, Any]) -> Dict[str, Any]:
         """Execute INSERT command."""
-        table_name = command['table']
+        table = self.db.get_table(command['table'])
+        row, error = self._insert_values(table, command)
+        if error:
+            return {'success': False, 'error': error}
+        
+        if command.get('ignore_conflicts'):
+            # ON CONFLICT DO NOTHING - a taken key is a no-op, not an error
+            if not table.insert_rows([row], ignore_conflicts=True):
+                return {'success': True, 'message': '0 rows inserted'}
+        else:
+            table.insert_row(row)
+        self._save()
+        
+        return {
+            'success': True,
+            'message': '1 row inserted'
+        }
+    
+    @staticmethod
+    def _insert_values(table: Any, command: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Build the row an INSERT command adds, or an error message."""
         values = command['values']
         columns = command.get('columns')
         
-        table = self.db.get_table(table_name)
-        
         # Build row dictionary
         if columns:
             # Specific columns provided
             if len(columns) != len(values):
-                return {'success': False, 'error': 'Column count does not match value count'}
-            row = {col: val for col, val in zip(columns, values)}
-        else:
-            # Use all columns in order
-            if len(table.columns) != len(values):
-                return {'success': False, 'error': f'Expected {len(table.columns)} values, got {len(values)}'}
-            row = {col['name']: val for col, val in zip(table.columns, values)}
+                return None, 'Column count does not match value count'
+            return {col: val for col, val in zip(columns, values)}, None
+        
+        # Use all columns in order
+        column_names = table.column_names
+        if len(column_names) != len(values):
+            return None, f'Expected {len(column_names)} values, got {len(values)}'
+        return dict(zip(column_names, values)), None
+    
+    def _execute_select(self, command: Dict[str, Any], columnar: bool = False) -> Dict[str, Any]:
+        """Execute SELECT command, reusing the last result while its tables are unchanged."""
+        tables = [self.db.get_table(command['table'])]
+        join = command.get('join')
+        if join:
+            tables.append(self.db.get_table(join['table']))
         
-        table.insert_row(row)
-        self.db.save()
+        # Tables without a version (e.g. remote storage) are never cached
+        if not all(hasattr(table, 'version') for table in tables):
+            return self._run_select(command, columnar)
         
-        return {
-            'success': True,
-            'message': '1 row inserted'
-        }
+        key = 'columnar_result' if columnar else 'result'
+        versions = [(table, table.version) for table in tables]
+        cached = command.get(key)
+        if cached is not None and all(
+            table is old_table and table.version == version
+            for table, (old_table, version) in zip(tables, cached[0])
+        ):
+            return self._copy_result(cached[1])
+        
+        result = self._run_select(command, columnar)
+        command[key] = (versions, result)
+        return self._copy_result(result)
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached SELECT result's lists so callers can't change the cache."""
+        copy = {**result, 'columns': list(result['columns'])}
+        if 'data' in copy:
+            copy['data'] = [list(values) for values in result['data']]
+        else:
+            copy['rows'] = list(result['rows'])
+        return copy
     
-    def _execute_select(self, command: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute SELECT command."""
+    def _run_select(self, command: Dict[str, Any], columnar: bool = False) -> Dict[str, Any]:
+        """Run a SELECT against the current table contents."""
         table_name = command['table']
         columns = command['columns']
-        where = command.get('where')
         order_by = command.get('order_by')
         limit = command.get('limit')
         
         table = self.db.get_table(table_name)
         
-        # Find matching rows
-        conditions = where['conditions'] if where else None
-        row_indexes = table.find_rows(conditions)
+        # Find matching rows - without ORDER BY, LIMIT can stop the scan early.
+        # Remote tables have no stable row positions, so they return the
+        # matching rows themselves instead of indexes into `rows`
+        remote = hasattr(table, 'select_rows')
+        row_indexes = self._find_rows(table, command, None if order_by else limit,
+                                      find=table.select_rows if remote else None)
         
-        # Get rows - fetch once for efficiency
-        all_rows = table.rows
-        rows = [all_rows[i] for i in row_indexes]
+        join = command.get('join')
+        is_count_query = command.get('is_count', False)
         
-        # Apply ORDER BY
-        if order_by:
-            col_name = order_by['column']
-            reverse = order_by['direction'] == 'DESC'
-            rows.sort(key=lambda r: r.get(col_name) if r.get(col_name) is not None else '', reverse=reverse)
+        # COUNT(*) without JOIN only needs the number of matches -
+        # skip materializing, sorting and slicing the rows
+        if is_count_query and not join:
+            alias = command['count_alias']
+            count = sum(1 for _ in row_indexes) if remote else len(row_indexes)
+            if limit:
+                count = min(count, limit)
+            if columnar:
+                return {'success': True, 'columns': [alias], 'data': [[count]], 'count': 1}
+            return {
+                'success': True,
+                'columns': [alias],
+                'rows': [{alias: count}],
+                'count': 1
+            }
         
-        # Apply LIMIT
-        if limit:
-            rows = rows[:limit]
+        # Get rows - fetch once for efficiency (a remote table's matches
+        # are already the rows, so it is never read whole)
+        all_rows = None if remote else table.rows
+        if order_by and not join and not remote and hasattr(table, 'sort_row_indexes'):
+            # Sort the indexes on the cached column, then fetch just the
+            # rows that are kept
+            row_indexes = table.sort_row_indexes(
+                row_indexes, order_by['column'], order_by['direction'] == 'DESC', limit
+            )
+            rows = map(all_rows.__getitem__, row_indexes)
+        elif order_by or join:
+            rows = list(row_indexes) if remote else [all_rows[i] for i in row_indexes]
+            
+            # Apply ORDER BY
+            if order_by:
+                rows = self._sort_rows(table, rows, order_by, limit)
+            
+            # Apply LIMIT
+            if limit:
+                rows = rows[:limit]
+        else:
+            # find_rows already applied LIMIT - fetch lazily so each row is
+            # read and projected in a single pass (remote rows stream
+            # straight from the table's cursor)
+            rows = iter(row_indexes) if remote else map(all_rows.__getitem__, row_indexes)
         
         # Handle JOIN
-        join = command.get('join')
         if join:
             join_table_name = join['table']
             join_table = self.db.get_table(join_table_name)
@@ -144,67 +380,98 @@ class QueryExecutor:
             left_col = join_on['left'].split('.')[-1]
             right_col = join_on['right'].split('.')[-1]
             
-            joined_rows = []
-            join_table_rows = join_table.rows
+            # Build side: hash the join table once on the join column
+            probe = {}
+            for j_row in join_table.iter_rows():
+                key = j_row.get(right_col)
+                if key is not None:
+                    probe.setdefault(key, []).append(j_row)
+            
+            # Join-table columns colliding with left-table names (e.g. id,
+            # title) are prefixed with the join table name - decide once
+            left_cols = set(table.column_names)
+            rename = {
+                name: f"{join_table_name}.{name}" if name in left_cols else name
+                for name in join_table.column_names
+            }
             
+            # A column list is projected straight out of each matched pair,
+            # so no merged row is built - each source is read from the side
+            # that owns it (colliding names resolve to the left table)
+            fused = None
+            if not is_count_query and columns != ['*']:
+                right_only = set(join_table.column_names) - left_cols
+                fused = [(source, alias, source in right_only) for source, alias in self._projection(command)]
+            
+            # Probe side: O(1) lookup per left row instead of a nested scan
+            joined_rows = []
             for row in rows:
                 match_val = row.get(left_col)
                 if match_val is not None:
-                    for j_row in join_table_rows:
-                        if j_row.get(right_col) == match_val:
-                            # Merge rows
-                            merged = row.copy()
-                            for k, v in j_row.items():
-                                # Add columns from join table
-                                if k not in merged:
-                                    merged[k] = v
-                                else:
-                                    # Handle title/id collisions
-                                    merged[f"{join_table_name}.{k}"] = v
-                            joined_rows.append(merged)
+                    for j_row in probe.get(match_val, ()):
+                        if fused is not None:
+                            joined_rows.append({
+                                alias: (j_row if right else row).get(source)
+                                for source, alias, right in fused
+                            })
+                            continue
+                        
+                        # Merge rows
+                        merged = dict(row)
+                        for k, v in j_row.items():
+                            merged[rename[k]] = v
+                        joined_rows.append(merged)
             rows = joined_rows
 
         # Select columns
-        is_count_query = any('COUNT(*)' in str(col) for col in columns)
-        
+        data = None
         if is_count_query:
-            count_col = columns[0]
-            alias = count_col.split('AS ')[-1] if 'AS ' in count_col else 'count'
+            alias = command['count_alias']
             result_columns = [alias]
             result_rows = [{alias: len(rows)}]
         elif columns == ['*']:
-            result_columns = [col['name'] for col in table.columns]
+            result_columns = list(table.column_names)
             if join:
-                # Add columns from join table
-                for col in join_table.columns:
-                    if col['name'] not in result_columns:
-                        result_columns.append(col['name'])
+                # Add columns from join table not already named by the left table
+                result_columns.extend(name for name in join_table.column_names if name not in left_cols)
+            result_rows = list(rows)
+        elif join:
+            # Already projected while joining
+            result_columns = [alias for _, alias in self._projection(command)]
             result_rows = rows
         else:
-            result_columns = []
-            final_rows = []
-            
-            # Extract actual column names and aliases
-            col_mappings = []
-            for col in columns:
-                if ' AS ' in col:
-                    parts = col.split(' AS ')
-                    source_col = parts[0].split('.')[-1]
-                    alias = parts[1]
-                    col_mappings.append((source_col, alias))
-                    result_columns.append(alias)
-                else:
-                    source_col = col.split('.')[-1]
-                    col_mappings.append((source_col, source_col))
-                    result_columns.append(source_col)
+            col_mappings = self._projection(command)
+            result_columns = [alias for _, alias in col_mappings]
             
-            for row in rows:
-                new_row = {}
-                for source, alias in col_mappings:
-                    new_row[alias] = row.get(source)
-                final_rows.append(new_row)
+            # Rows carry every table column, so when all sources are known
+            # columns they can be indexed directly
+            plan = self._plan_holder(command)
+            direct = plan.get('projection_direct')
+            if direct is None:
+                available = set(table.column_names)
+                direct = plan['projection_direct'] = all(source in available for source, _ in col_mappings)
             
-            result_rows = final_rows
+            if columnar:
+                # One C-level pass per column instead of a dict per row
+                result_rows = list(rows)
+                data = [
+                    list(map(itemgetter(source) if direct else methodcaller('get', source), result_rows))
+                    for source, _ in col_mappings
+                ]
+            elif direct:
+                result_rows = [{alias: row[source] for source, alias in col_mappings} for row in rows]
+            else:
+                result_rows = [{alias: row.get(source) for source, alias in col_mappings} for row in rows]
+        
+        if columnar:
+            if data is None:
+                data = [list(map(methodcaller('get', name), result_rows)) for name in result_columns]
+            return {
+                'success': True,
+                'columns': result_columns,
+                'data': data,
+                'count': len(result_rows)
+            }
         
         return {
             'success': True,
@@ -213,47 +480,154 @@ class QueryExecutor:
             'count': len(result_rows)
         }
     
+    def _projection(self, command: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Get (source column, output name) pairs for a SELECT's column list."""
+        # Parsed once per cached plan rather than on every execution
+        command = self._plan_holder(command)
+        col_mappings = command.get('projection')
+        if col_mappings is None:
+            col_mappings = []
+            for col in command['columns']:
+                if ' AS ' in col:
+                    source, alias = col.split(' AS ')
+                    col_mappings.append((source.split('.')[-1], alias))
+                else:
+                    source = col.split('.')[-1]
+                    col_mappings.append((source, source))
+            command['projection'] = col_mappings
+        return col_mappings
+    
+    @staticmethod
+    def _plan_holder(command: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the dict that value-independent plans for a command are kept on."""
+        # Commands bound from a ? template share the template's plans
+        return command.get('template', command)
+    
+    def _find_rows(self, table, command: Dict[str, Any], limit: Optional[int] = None,
+                   find: Optional[Callable[..., List[Any]]] = None) -> List[Any]:
+        """Find rows matching a command's WHERE clause using its planned condition order.
+        
+        The matches come from `find`, the table's find_rows (row indexes)
+        unless e.g. its find_keys (primary keys) is given instead.
+        """
+        find = find or table.find_rows
+        limit = limit or None  # LIMIT 0 means no limit
+        where = command.get('where')
+        if not where:
+            return find(None, limit)
+        
+        # The order only depends on operators and columns, so it lives on
+        # the cached command (or template), which DDL flushes
+        plan_where = self._plan_holder(command)['where']
+        order = plan_where.get('plan_order')
+        if order is None:
+            order = plan_where['plan_order'] = self._plan_conditions(table, plan_where['conditions'])
+        
+        conditions = where['conditions']
+        if order:
+            conditions = [conditions[step] if type(step) is int else step for step in order]
+        return find(conditions, limit)
+    
+    def _plan_conditions(self, table, conditions: List[Dict[str, Any]]) -> List[Any]:
+        """Order AND-chained predicates so the most selective run first.
+        
+        Returns condition positions joined by AND markers, or an empty list
+        when the chain has to run as written.
+        """
+        if any(cond.get('logic') == 'OR' for cond in conditions):
+            # Mixed AND/OR chains are evaluated left to right - keep order
+            return []
+        
+        indexed = set(table.unique_columns)
+        if table.primary_key:
+            indexed.add(table.primary_key)
+        
+        def rank(cond):
+            if cond['operator'] == '=' and cond['column'] in indexed:
+                return 0
+            return PREDICATE_RANK.get(cond['operator'], 4)
+        
+        and_marker = Parser.LOGIC_MARKERS['AND']
+        planned = []
+        positions = (i for i, cond in enumerate(conditions) if 'logic' not in cond)
+        for position in sorted(positions, key=lambda i: rank(conditions[i])):
+            if planned:
+                planned.append(and_marker)
+            planned.append(position)
+        return planned
+    
+    def _sort_rows(self, table, rows: List[Dict[str, Any]], order_by: Dict[str, Any],
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Sort rows for ORDER BY, keeping only the first `limit` if given."""
+        col_name = order_by['column']
+        reverse = order_by['direction'] == 'DESC'
+        
+        # Pull the key column out in one C-level pass, then order positions
+        # by it - no Python key function runs per row
+        keys = list(map(methodcaller('get', col_name), rows))
+        if None in keys:
+            column = table.get_column(col_name)
+            null_key = NULL_SORT_KEYS.get(column['type'], '') if column else ''
+            keys = [null_key if value is None else value for value in keys]
+        
+        # Top-K: a heap is O(N log K) instead of a full O(N log N) sort
+        positions = range(len(keys))
+        if limit and limit < len(keys):
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            positions = pick(limit, positions, key=keys.__getitem__)
+        else:
+            positions = sorted(positions, key=keys.__getitem__, reverse=reverse)
+        return list(map(rows.__getitem__, positions))
+    
     def _execute_update(self, command: Dict[str, Any]) -> Dict[str, Any]:
         """Execute UPDATE command."""
         table_name = command['table']
         updates = command['updates']
-        where = command.get('where')
         
         table = self.db.get_table(table_name)
         
-        # Find matching rows
-        conditions = where['conditions'] if where else None
-        row_indexes = table.find_rows(conditions)
-        
-        # Update rows
-        for index in row_indexes:
-            table.update_row(index, updates)
-        
-        self.db.save()
+        # Remote tables have no stable row positions - they are updated by key
+        if hasattr(table, 'update_keys'):
+            matched = self._find_rows(table, command, find=table.find_keys)
+            if matched:
+                table.update_keys(matched, updates)
+        else:
+            # Find matching rows
+            matched = self._find_rows(table, command)
+            
+            # Update rows
+            if matched:
+                table.update_rows(matched, updates)
+        if matched:
+            self._save()
         
         return {
             'success': True,
-            'message': f"{len(row_indexes)} row(s) updated"
+            'message': f"{len(matched)} row(s) updated"
         }
     
     def _execute_delete(self, command: Dict[str, Any]) -> Dict[str, Any]:
         """Execute DELETE command."""
         table_name = command['table']
-        where = command.get('where')
         
         table = self.db.get_table(table_name)
         
-        # Find matching rows
-        conditions = where['conditions'] if where else None
-        row_indexes = table.find_rows(conditions)
-        
-        # Delete rows (in reverse order to maintain indexes)
-        for index in sorted(row_indexes, reverse=True):
-            table.delete_row(index)
-        
-        self.db.save()
+        # Remote tables have no stable row positions - they are deleted by key
+        if hasattr(table, 'delete_keys'):
+            matched = self._find_rows(table, command, find=table.find_keys)
+            if matched:
+                table.delete_keys(matched)
+        else:
+            # Find matching rows
+            matched = self._find_rows(table, command)
+            
+            # Delete rows
+            if matched:
+                table.delete_rows(matched)
+        if matched:
+            self._save()
         
         return {
             'success': True,
-            'message': f"{len(row_indexes)} row(s) deleted"
+            'message': f"{len(matched)} row(s) deleted"
         }
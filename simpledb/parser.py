@@ -5,123 +5,204 @@ Tokenizes and parses SQL commands into structured dictionaries.
 """
 
 import re
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterator, List, Dict, Any, Optional, Sequence
 from .exceptions import ParseError
 
 
 class Token:
     """Represents a single token in SQL."""
     
-    def __init__(self, type_: str, value: Any):
+    __slots__ = ('type', 'value')
+    
+    def __init__(self, type_: str, value: Any) -> None:
         self.type = type_
         self.value = value
     
-    def __repr__(self):
+    def __repr__(self) -> str:
         return f"Token({self.type}, {self.value!r})"
 
 
+class Param:
+    """Placeholder for the value of a ? parameter in a compiled statement."""
+    
+    __slots__ = ('index',)
+    
+    def __init__(self, index: int) -> None:
+        self.index = index
+    
+    def __repr__(self) -> str:
+        return f"Param({self.index})"
+
+
+def bind_params(node: Any, params: Sequence[Any]) -> Any:
+    """Copy a parsed template with each Param replaced by its value.
+    
+    Parts without placeholders are shared with the template rather than
+    copied, so only the path down to each Param is rebuilt.
+    """
+    if type(node) is Param:
+        return params[node.index]
+    if type(node) is dict:
+        bound = None
+        for key, value in node.items():
+            new_value = bind_params(value, params)
+            if new_value is not value:
+                if bound is None:
+                    bound = dict(node)
+                bound[key] = new_value
+        return node if bound is None else bound
+    if type(node) is list:
+        items = [bind_params(value, params) for value in node]
+        if any(new_value is not value for new_value, value in zip(items, node)):
+            return items
+    return node
+
+
 class Tokenizer:
     """Tokenizes SQL strings into a list of tokens."""
     
-    # SQL keywords
-    KEYWORDS = {
+    # SQL keywords (frozen: the lookup tables below are built from them once)
+    KEYWORDS = frozenset({
         'SELECT', 'FROM', 'WHERE', 'INSERT', 'INTO', 'VALUES', 'UPDATE', 'SET',
         'DELETE', 'CREATE', 'TABLE', 'DROP', 'PRIMARY', 'KEY', 'UNIQUE', 'NOT',
         'NULL', 'INT', 'VARCHAR', 'BOOLEAN', 'ORDER', 'BY', 'LIMIT', 'ASC', 'DESC',
-        'AND', 'OR', 'INNER', 'JOIN', 'ON', 'TRUE', 'FALSE', 'IF', 'EXISTS', 'AS'
-    }
+        'AND', 'OR', 'INNER', 'JOIN', 'ON', 'TRUE', 'FALSE', 'IF', 'EXISTS', 'AS',
+        'CONFLICT', 'DO', 'NOTHING'
+    })
     
     # Operators
-    OPERATORS = {'=', '!=', '<', '<=', '>', '>=', ',', '(', ')', ';', '*'}
+    OPERATORS = frozenset({'=', '!=', '<', '<=', '>', '>=', ',', '(', ')', ';', '*'})
+    
+    # Keyword, boolean and operator tokens never change, so one shared
+    # instance of each is handed out instead of a new Token per occurrence
+    
+    # Upper-cased word -> token for words that are not identifiers
+    WORDS = {
+        **{keyword: Token('KEYWORD', keyword) for keyword in KEYWORDS},
+        'TRUE': Token('BOOLEAN', True),
+        'FALSE': Token('BOOLEAN', False),
+    }
+    
+    # Lower-case spellings too, so the usual all-upper or all-lower words
+    # are found without calling upper() first
+    WORDS.update({word.lower(): known for word, known in WORDS.items()})
+    
+    # Longer words can only be identifiers
+    MAX_WORD_LENGTH = max(map(len, KEYWORDS))
+    
+    OPERATOR_TOKENS = {op: Token('OPERATOR', op) for op in OPERATORS}
+    PARAM_TOKEN = Token('PARAM', '?')
+    
+    # One alternative per token class, tried in order, so the statement is
+    # scanned by the regex engine rather than a Python loop per character.
+    # Whitespace before a token is consumed by the same match, so it never
+    # costs a loop iteration of its own
+    TOKEN_RE = re.compile(r"""
+        \s*
+        (?:
+          '(?P<STRING>(?:\\.|[^'\\])*)'
+        | "(?P<DSTRING>(?:\\.|[^"\\])*)"
+        | (?P<NUMBER>-?\d[\d.]*)
+        | (?P<OPERATOR>!=|<=|>=|[=<>,();*])
+        | (?P<PARAM>\?)
+        | (?P<WORD>[^\W\d][\w.]*)
+        )
+    """, re.VERBOSE | re.DOTALL)
+    
+    SPACE_RE = re.compile(r'\s*')
     
     def tokenize(self, sql: str) -> List[Token]:
         """Convert SQL string into list of tokens."""
-        tokens = []
-        i = 0
+        return list(self.tokenize_iter(sql))
+    
+    def tokenize_iter(self, sql: str) -> Iterator[Token]:
+        """Yield the tokens of a SQL string one at a time, as they are scanned."""
         sql = sql.strip()
+        # The scanner resumes where its last match ended, so each call
+        # skips re-passing the string and position
+        match = self.TOKEN_RE.scanner(sql).match
+        words = self.WORDS
+        operators = self.OPERATOR_TOKENS
+        max_word_length = self.MAX_WORD_LENGTH
+        end = len(sql)
+        i = 0
         
-        while i < len(sql):
-            # Skip whitespace
-            if sql[i].isspace():
-                i += 1
-                continue
-            
-            # Handle strings (single or double quotes)
-            if sql[i] in ('"', "'"):
-                quote = sql[i]
-                i += 1
-                start = i
-                while i < len(sql) and sql[i] != quote:
-                    if sql[i] == '\\' and i + 1 < len(sql):
-                        i += 2
-                    else:
-                        i += 1
-                if i >= len(sql):
-                    raise ParseError(f"Unterminated string starting at position {start}")
-                tokens.append(Token('STRING', sql[start:i]))
-                i += 1
-                continue
+        while i < end:
+            m = match()
+            if m is None:
+                i = self.SPACE_RE.match(sql, i).end()
+                if sql[i] in ('"', "'"):
+                    raise ParseError(f"Unterminated string starting at position {i + 1}")
+                raise ParseError(f"Unexpected character '{sql[i]}' at position {i}")
+            i = m.end()
+            kind = m.lastgroup
+            text = m.group(kind)
             
-            # Handle numbers
-            if sql[i].isdigit() or (sql[i] == '-' and i + 1 < len(sql) and sql[i + 1].isdigit()):
-                start = i
-                if sql[i] == '-':
-                    i += 1
-                while i < len(sql) and (sql[i].isdigit() or sql[i] == '.'):
-                    i += 1
-                num_str = sql[start:i]
-                if '.' in num_str:
-                    tokens.append(Token('NUMBER', float(num_str)))
+            if kind == 'WORD':
+                # Keywords and booleans by length and a lookup, identifiers
+                # on a miss; only mixed-case words need upper()
+                known = None
+                if len(text) <= max_word_length:
+                    known = words.get(text)
+                    if known is None and not (text.islower() or text.isupper()):
+                        known = words.get(text.upper())
+                if known is not None:
+                    yield known
                 else:
-                    tokens.append(Token('NUMBER', int(num_str)))
-                continue
-            
-            # Handle two-character operators
-            if i + 1 < len(sql) and sql[i:i+2] in ('!=', '<=', '>='):
-                tokens.append(Token('OPERATOR', sql[i:i+2]))
-                i += 2
-                continue
-            
-            # Handle single-character operators
-            if sql[i] in self.OPERATORS:
-                tokens.append(Token('OPERATOR', sql[i]))
-                i += 1
-                continue
-            
-            # Handle identifiers and keywords
-            if sql[i].isalpha() or sql[i] == '_':
-                start = i
-                while i < len(sql) and (sql[i].isalnum() or sql[i] in ('_', '.')):
-                    i += 1
-                word = sql[start:i]
-                word_upper = word.upper()
-                
-                if word_upper in self.KEYWORDS:
-                    tokens.append(Token('KEYWORD', word_upper))
-                elif word_upper == 'TRUE':
-                    tokens.append(Token('BOOLEAN', True))
-                elif word_upper == 'FALSE':
-                    tokens.append(Token('BOOLEAN', False))
+                    yield Token('IDENTIFIER', text)
+            elif kind == 'OPERATOR':
+                yield operators[text]
+            elif kind == 'PARAM':
+                yield self.PARAM_TOKEN
+            elif kind == 'STRING' or kind == 'DSTRING':
+                # The groups capture only the text between the quotes, so
+                # the value needs no second slice
+                yield Token('STRING', text)
+            elif kind == 'NUMBER':
+                if '.' in text:
+                    yield Token('NUMBER', float(text))
                 else:
-                    tokens.append(Token('IDENTIFIER', word))
-                continue
-            
-            raise ParseError(f"Unexpected character '{sql[i]}' at position {i}")
-        
-        return tokens
+                    yield Token('NUMBER', int(text))
 
 
 class Parser:
     """Parses tokens into structured command dictionaries."""
     
-    def __init__(self):
+    # Fixed attributes keep the parser compilable as a native class (mypyc)
+    __slots__ = ('tokenizer', 'tokens', 'pos', '_dispatch', '_param_count', '_compiled')
+    
+    # Maximum number of compiled statement templates kept
+    COMPILE_CACHE_SIZE = 256
+    
+    # AND/OR entries carry nothing but the keyword, so every WHERE clause
+    # shares these instead of allocating one per connective (read-only)
+    LOGIC_MARKERS = {'AND': {'logic': 'AND'}, 'OR': {'logic': 'OR'}}
+    
+    def __init__(self) -> None:
         self.tokenizer = Tokenizer()
-        self.tokens = []
+        self.tokens: List[Token] = []
         self.pos = 0
+        self._param_count: Optional[int] = None  # ? placeholders seen, None unless compiling
+        self._compiled: Dict[str, Callable[[Sequence[Any]], Dict[str, Any]]] = {}
+        self._dispatch = {
+            'CREATE': self.parse_create,
+            'DROP': self.parse_drop,
+            'INSERT': self.parse_insert,
+            'SELECT': self.parse_select,
+            'UPDATE': self.parse_update,
+            'DELETE': self.parse_delete,
+        }
     
     def parse(self, sql: str) -> Dict[str, Any]:
         """Parse SQL string into command dictionary."""
-        self.tokens = self.tokenizer.tokenize(sql)
+        tokens = self.tokenizer.tokenize_iter(sql)
+        
+        # Reject an unknown leading keyword before scanning the rest
+        first_token = next(tokens, None)
+        if first_token is not None and first_token.type == 'KEYWORD' and first_token.value not in self._dispatch:
+            raise ParseError(f"Unknown command: {first_token.value}")
+        
+        self.tokens = [first_token, *tokens] if first_token is not None else []
         self.pos = 0
         
         if not self.tokens:
@@ -134,26 +215,58 @@ class Parser:
         if not self.tokens:
             raise ParseError("Empty SQL statement")
         
-        first_token = self.current()
+        first_token = self.tokens[0]
         if first_token.type != 'KEYWORD':
             raise ParseError(f"Expected keyword, got {first_token.type}")
         
         command = first_token.value
         
-        if command == 'CREATE':
-            return self.parse_create()
-        elif command == 'DROP':
-            return self.parse_drop()
-        elif command == 'INSERT':
-            return self.parse_insert()
-        elif command == 'SELECT':
-            return self.parse_select()
-        elif command == 'UPDATE':
-            return self.parse_update()
-        elif command == 'DELETE':
-            return self.parse_delete()
-        else:
+        handler = self._dispatch.get(command)
+        if handler is None:
             raise ParseError(f"Unknown command: {command}")
+        return handler()
+    
+    def compile(self, sql_template: str) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        """Compile a statement with ? placeholders into a function from parameter values to its parsed command.
+        
+        The template is parsed once. Each bound command points back to it
+        under 'template', so plans that don't depend on the values can be
+        kept on the template and shared by every call.
+        """
+        bound = self._compiled.get(sql_template)
+        if bound is not None:
+            return bound
+        
+        self._param_count = 0
+        try:
+            template = self.parse(sql_template)
+            count = self._param_count
+        finally:
+            self._param_count = None
+        
+        def bound(params: Sequence[Any]) -> Dict[str, Any]:
+            if len(params) != count:
+                raise ParseError(f"Expected {count} parameters, got {len(params)}")
+            command = dict(bind_params(template, params))
+            command['template'] = template
+            return command
+        
+        if len(self._compiled) >= self.COMPILE_CACHE_SIZE:
+            del self._compiled[next(iter(self._compiled))]
+        self._compiled[sql_template] = bound
+        return bound
+    
+    def clear_compiled(self) -> None:
+        """Discard all compiled statement templates."""
+        self._compiled.clear()
+    
+    def _param(self) -> Param:
+        """Get the placeholder for the next ? parameter."""
+        if self._param_count is None:
+            raise ParseError("Parameter placeholders (?) are only allowed in compiled statements")
+        param = Param(self._param_count)
+        self._param_count += 1
+        return param
     
     def current(self) -> Optional[Token]:
         """Get current token without advancing."""
@@ -169,14 +282,17 @@ class Parser:
     
     def expect(self, type_: str, value: Any = None) -> Token:
         """Expect a specific token type and optionally value."""
-        token = self.current()
-        if not token:
+        pos = self.pos
+        tokens = self.tokens
+        if pos >= len(tokens):
             raise ParseError(f"Expected {type_} but reached end of statement")
+        token = tokens[pos]
         if token.type != type_:
             raise ParseError(f"Expected {type_}, got {token.type}")
         if value is not None and token.value != value:
             raise ParseError(f"Expected {value}, got {token.value}")
-        return self.advance()
+        self.pos = pos + 1
+        return token
     
     def parse_create(self) -> Dict[str, Any]:
         """Parse CREATE TABLE statement."""
@@ -184,7 +300,8 @@ class Parser:
         self.expect('KEYWORD', 'TABLE')
         
         if_not_exists = False
-        if self.current() and self.current().value == 'IF':
+        tok = self.current()
+        if tok and tok.value == 'IF':
             self.advance()
             self.expect('KEYWORD', 'NOT')
             self.expect('KEYWORD', 'EXISTS')
@@ -211,8 +328,9 @@ class Parser:
             
             # Handle constraints
             constraints = []
-            while self.current() and self.current().type == 'KEYWORD':
-                keyword = self.current().value
+            tok = self.current()
+            while tok and tok.type == 'KEYWORD':
+                keyword = tok.value
                 if keyword == 'PRIMARY':
                     self.advance()
                     self.expect('KEYWORD', 'KEY')
@@ -226,13 +344,14 @@ class Parser:
                     constraints.append('NOT NULL')
                 else:
                     break
+                tok = self.current()
             
             if constraints:
                 col_def['constraints'] = constraints
             
             columns.append(col_def)
             
-            if self.current() and self.current().value == ',':
+            if tok and tok.value == ',':
                 self.advance()
             else:
                 break
@@ -264,12 +383,14 @@ class Parser:
         table_name = self.expect('IDENTIFIER').value
         
         columns = None
-        if self.current() and self.current().value == '(':
+        tok = self.current()
+        if tok and tok.value == '(':
             self.advance()
             columns = []
             while True:
                 columns.append(self.expect('IDENTIFIER').value)
-                if self.current() and self.current().value == ',':
+                tok = self.current()
+                if tok and tok.value == ',':
                     self.advance()
                 else:
                     break
@@ -280,16 +401,21 @@ class Parser:
         
         values = []
         while True:
-            token = self.current()
-            if token.type in ('STRING', 'NUMBER', 'BOOLEAN'):
-                values.append(self.advance().value)
-            elif token.type == 'KEYWORD' and token.value == 'NULL':
-                self.advance()
+            tok = self.current()
+            if tok is None:
+                raise ParseError("Expected value but reached end of statement")
+            if tok.type in ('STRING', 'NUMBER', 'BOOLEAN'):
+                values.append(tok.value)
+            elif tok.type == 'KEYWORD' and tok.value == 'NULL':
                 values.append(None)
+            elif tok.type == 'PARAM':
+                values.append(self._param())
             else:
-                raise ParseError(f"Expected value, got {token.type}")
+                raise ParseError(f"Expected value, got {tok.type}")
+            self.advance()
             
-            if self.current() and self.current().value == ',':
+            tok = self.current()
+            if tok and tok.value == ',':
                 self.advance()
             else:
                 break
@@ -305,6 +431,15 @@ class Parser:
         if columns:
             result['columns'] = columns
         
+        # ON CONFLICT DO NOTHING skips rows that hit a PRIMARY KEY / UNIQUE value
+        tok = self.current()
+        if tok and tok.type == 'KEYWORD' and tok.value == 'ON':
+            self.advance()
+            self.expect('KEYWORD', 'CONFLICT')
+            self.expect('KEYWORD', 'DO')
+            self.expect('KEYWORD', 'NOTHING')
+            result['ignore_conflicts'] = True
+        
         return result
     
     def parse_select(self) -> Dict[str, Any]:
@@ -313,41 +448,49 @@ class Parser:
         
         # Parse columns
         columns = []
+        count_alias = None
         while True:
             # Check if we've reached FROM
-            if self.current() and self.current().type == 'KEYWORD' and self.current().value == 'FROM':
+            tok = self.current()
+            if tok and tok.type == 'KEYWORD' and tok.value == 'FROM':
                 break
                 
-            if self.current() and self.current().value == '*':
+            if tok and tok.value == '*':
                 self.advance()
                 columns.append('*')
-            elif self.current() and self.current().type == 'IDENTIFIER' and self.current().value.upper() == 'COUNT':
+            elif tok and tok.type == 'IDENTIFIER' and tok.value.upper() == 'COUNT':
                 self.advance() # COUNT
                 self.expect('OPERATOR', '(')
                 self.expect('OPERATOR', '*')
                 self.expect('OPERATOR', ')')
                 # Handle AS alias
                 alias = 'count'
-                if self.current() and self.current().type == 'KEYWORD' and self.current().value == 'AS':
+                tok = self.current()
+                if tok and tok.type == 'KEYWORD' and tok.value == 'AS':
                     self.advance()
                     alias = self.expect('IDENTIFIER').value
                 columns.append(f'COUNT(*) AS {alias}')
-            elif self.current() and self.current().type == 'IDENTIFIER':
-                col_name = self.advance().value
+                if count_alias is None:
+                    count_alias = alias
+            elif tok and tok.type == 'IDENTIFIER':
+                col_name = tok.value
+                self.advance()
                 # Handle AS alias
-                if self.current() and self.current().type == 'KEYWORD' and self.current().value == 'AS':
+                tok = self.current()
+                if tok and tok.type == 'KEYWORD' and tok.value == 'AS':
                     self.advance()
                     alias = self.expect('IDENTIFIER').value
                     columns.append(f"{col_name} AS {alias}")
                 else:
                     columns.append(col_name)
             else:
-                current_val = self.current().value if self.current() else 'EOF'
+                current_val = tok.value if tok else 'EOF'
                 raise ParseError(f"Expected column or FROM, got {current_val}")
             
-            if self.current() and self.current().value == ',':
+            tok = self.current()
+            if tok and tok.value == ',':
                 self.advance()
-            elif self.current() and self.current().type == 'KEYWORD' and self.current().value == 'FROM':
+            elif tok and tok.type == 'KEYWORD' and tok.value == 'FROM':
                 break
             else:
                 # If next isn't a comma or FROM, we might have an issue, 
@@ -363,9 +506,15 @@ class Parser:
             'table': table_name
         }
         
+        # Tag aggregates so the executor need not inspect column strings
+        if count_alias is not None:
+            result['is_count'] = True
+            result['count_alias'] = count_alias
+        
         # Parse optional JOIN
-        if self.current() and self.current().type == 'KEYWORD' and self.current().value in ('INNER', 'JOIN'):
-            if self.current().value == 'INNER':
+        tok = self.current()
+        if tok and tok.type == 'KEYWORD' and tok.value in ('INNER', 'JOIN'):
+            if tok.value == 'INNER':
                 self.advance()
                 self.expect('KEYWORD', 'JOIN')
             else:
@@ -387,22 +536,27 @@ class Parser:
             }
         
         # Parse optional WHERE
-        if self.current() and self.current().value == 'WHERE':
+        tok = self.current()
+        if tok and tok.value == 'WHERE':
             self.advance()
             result['where'] = self.parse_where()
+            tok = self.current()
         
         # Parse optional ORDER BY
-        if self.current() and self.current().value == 'ORDER':
+        if tok and tok.value == 'ORDER':
             self.advance()
             self.expect('KEYWORD', 'BY')
             order_col = self.expect('IDENTIFIER').value
             direction = 'ASC'
-            if self.current() and self.current().type == 'KEYWORD' and self.current().value in ('ASC', 'DESC'):
-                direction = self.advance().value
+            tok = self.current()
+            if tok and tok.type == 'KEYWORD' and tok.value in ('ASC', 'DESC'):
+                direction = tok.value
+                self.advance()
+                tok = self.current()
             result['order_by'] = {'column': order_col, 'direction': direction}
         
         # Parse optional LIMIT
-        if self.current() and self.current().value == 'LIMIT':
+        if tok and tok.value == 'LIMIT':
             self.advance()
             result['limit'] = self.expect('NUMBER').value
         
@@ -410,20 +564,33 @@ class Parser:
     
     def parse_where(self) -> Dict[str, Any]:
         """Parse WHERE clause."""
+        # Walk the tokens with a local index - self.pos is written back
+        # only on return or when reporting an error
+        tokens = self.tokens
+        end = len(tokens)
+        pos = self.pos
+        logic_markers = self.LOGIC_MARKERS
         conditions = []
         
         while True:
-            column = self.expect('IDENTIFIER').value
-            operator = self.expect('OPERATOR').value
+            if pos + 2 >= end or tokens[pos].type != 'IDENTIFIER' or tokens[pos + 1].type != 'OPERATOR':
+                self.pos = pos
+                self.expect('IDENTIFIER')
+                self.expect('OPERATOR')
+                raise ParseError("Expected value in WHERE clause but reached end of statement")
+            column = tokens[pos].value
+            operator = tokens[pos + 1].value
             
-            value_token = self.current()
+            value_token = tokens[pos + 2]
             if value_token.type in ('STRING', 'NUMBER', 'BOOLEAN'):
-                value = self.advance().value
+                value = value_token.value
             elif value_token.type == 'KEYWORD' and value_token.value == 'NULL':
-                self.advance()
                 value = None
+            elif value_token.type == 'PARAM':
+                value = self._param()
             else:
                 raise ParseError(f"Expected value in WHERE clause, got {value_token.type}")
+            pos += 3
             
             conditions.append({
                 'column': column,
@@ -431,12 +598,14 @@ class Parser:
                 'value': value
             })
             
-            if self.current() and self.current().type == 'KEYWORD' and self.current().value in ('AND', 'OR'):
-                logic = self.advance().value
-                conditions.append({'logic': logic})
+            token = tokens[pos] if pos < end else None
+            if token is not None and token.type == 'KEYWORD' and token.value in ('AND', 'OR'):
+                conditions.append(logic_markers[token.value])
+                pos += 1
             else:
                 break
         
+        self.pos = pos
         return {'conditions': conditions}
     
     def parse_update(self) -> Dict[str, Any]:
@@ -450,18 +619,23 @@ class Parser:
             column = self.expect('IDENTIFIER').value
             self.expect('OPERATOR', '=')
             
-            value_token = self.current()
-            if value_token.type in ('STRING', 'NUMBER', 'BOOLEAN'):
-                value = self.advance().value
-            elif value_token.type == 'KEYWORD' and value_token.value == 'NULL':
-                self.advance()
+            tok = self.current()
+            if tok is None:
+                raise ParseError("Expected value in SET clause but reached end of statement")
+            if tok.type in ('STRING', 'NUMBER', 'BOOLEAN'):
+                value = tok.value
+            elif tok.type == 'KEYWORD' and tok.value == 'NULL':
                 value = None
+            elif tok.type == 'PARAM':
+                value = self._param()
             else:
-                raise ParseError(f"Expected value in SET clause, got {value_token.type}")
+                raise ParseError(f"Expected value in SET clause, got {tok.type}")
+            self.advance()
             
             updates[column] = value
             
-            if self.current() and self.current().value == ',':
+            tok = self.current()
+            if tok and tok.value == ',':
                 self.advance()
             else:
                 break
@@ -472,7 +646,8 @@ class Parser:
             'updates': updates
         }
         
-        if self.current() and self.current().value == 'WHERE':
+        tok = self.current()
+        if tok and tok.value == 'WHERE':
             self.advance()
             result['where'] = self.parse_where()
         
@@ -489,7 +664,8 @@ class Parser:
             'table': table_name
         }
         
-        if self.current() and self.current().value == 'WHERE':
+        tok = self.current()
+        if tok and tok.value == 'WHERE':
             self.advance()
             result['where'] = self.parse_where()
         
@@ -14,10 +14,38 @@ from .exceptions import SimpleDBException
 class REPL:
     """Interactive Read-Eval-Print Loop for SimpleDB."""
     
+    # Result table lines written to stdout per write() call
+    PRINT_BATCH_SIZE = 1024
+    
+    HELP_LINES = (
+        "\nSimpleDB REPL Commands:",
+        "  .exit, .quit     - Exit the REPL",
+        "  .tables          - List all tables",
+        "  .schema <table>  - Show table schema",
+        "  .flushcache      - Clear cached query plans",
+        "  .help            - Show this help message",
+        "\nSQL Commands:",
+        "  CREATE TABLE ... - Create a new table",
+        "  DROP TABLE ...   - Drop a table",
+        "  INSERT INTO ...  - Insert a row",
+        "  SELECT ...       - Query data",
+        "  UPDATE ...       - Update rows",
+        "  DELETE FROM ...  - Delete rows",
+        "\nEnd SQL statements with a semicolon (;)",
+    )
+    
     def __init__(self, db_file: str = 'simpledb.json'):
         self.db = Database(db_file)
         self.executor = QueryExecutor(self.db)
         self.running = True
+        self._special_commands = {
+            '.exit': self._exit,
+            '.quit': self._exit,
+            '.tables': self._tables,
+            '.schema': self._schema,
+            '.flushcache': self._flushcache,
+            '.help': self._help,
+        }
     
     def print_table(self, columns: list, rows: list):
         """Print results in a formatted table."""
@@ -25,103 +53,104 @@ class REPL:
             print("0 row(s) selected.")
             return
         
-        # Calculate column widths
-        col_widths = {}
-        for col in columns:
-            col_widths[col] = len(str(col))
-        
+        # Render every cell to text once; widths come from the rendered text
+        str_rows = []
         for row in rows:
+            values = []
             for col in columns:
                 value = row.get(col, '')
-                col_widths[col] = max(col_widths[col], len(str(value)))
+                values.append('NULL' if value is None else str(value))
+            str_rows.append(values)
         
-        # Print header
-        header = '+' + '+'.join('-' * (col_widths[col] + 2) for col in columns) + '+'
-        print(header)
+        col_widths = [
+            max(len(str(col)), *map(len, cells))
+            for col, cells in zip(columns, zip(*str_rows))
+        ]
         
-        col_row = '|' + '|'.join(f" {col:<{col_widths[col]}} " for col in columns) + '|'
-        print(col_row)
-        print(header)
+        # Collect output lines and write them in batches instead of one
+        # print() per line
+        header = '+' + '+'.join('-' * (width + 2) for width in col_widths) + '+'
+        col_row = '| ' + ' | '.join(str(col).ljust(width) for col, width in zip(columns, col_widths)) + ' |'
+        lines = [header, col_row, header]
         
-        # Print rows
-        for row in rows:
-            values = []
-            for col in columns:
-                value = row.get(col, '')
-                if value is None:
-                    value = 'NULL'
-                values.append(f" {str(value):<{col_widths[col]}} ")
-            print('|' + '|'.join(values) + '|')
+        write = sys.stdout.write
+        for values in str_rows:
+            lines.append('| ' + ' | '.join(value.ljust(width) for value, width in zip(values, col_widths)) + ' |')
+            if len(lines) >= self.PRINT_BATCH_SIZE:
+                write('\n'.join(lines) + '\n')
+                lines = []
         
-        print(header)
-        print(f"{len(rows)} row(s) selected.")
+        lines.append(header)
+        lines.append(f"{len(rows)} row(s) selected.")
+        write('\n'.join(lines) + '\n')
     
     def execute_special_command(self, command: str) -> bool:
         """Execute special REPL commands. Returns True if command was handled."""
-        command = command.strip()
-        
-        if command == '.exit' or command == '.quit':
-            print("Goodbye!")
-            self.running = False
-            return True
-        
-        elif command == '.tables':
-            tables = self.db.list_tables()
-            if tables:
-                print("Tables:")
-                for table in tables:
-                    print(f"  - {table}")
-            else:
-                print("No tables found.")
-            return True
-        
-        elif command.startswith('.schema'):
-            parts = command.split()
-            if len(parts) < 2:
-                print("Usage: .schema <table_name>")
-                return True
-            
-            table_name = parts[1]
-            try:
-                table = self.db.get_table(table_name)
-                print(f"\nTable: {table.name}")
-                print("Columns:")
-                for col in table.columns:
-                    col_def = f"  - {col['name']} {col['type']}"
-                    if col['type'] == 'VARCHAR':
-                        col_def += f"({col.get('length', 255)})"
-                    if 'constraints' in col:
-                        col_def += f" [{', '.join(col['constraints'])}]"
-                    print(col_def)
-            except SimpleDBException as e:
-                print(f"Error: {e}")
-            return True
+        name, _, arg = command.strip().partition(' ')
+        handler = self._special_commands.get(name.lower())
+        if handler is None:
+            return False
+        handler(arg.strip())
+        return True
+    
+    def _exit(self, arg: str):
+        """Handle .exit / .quit."""
+        print("Goodbye!")
+        self.running = False
+    
+    def _tables(self, arg: str):
+        """Handle .tables."""
+        tables = self.db.list_tables()
+        if tables:
+            self._write_lines(["Tables:"] + [f"  - {table}" for table in tables])
+        else:
+            print("No tables found.")
+    
+    def _schema(self, arg: str):
+        """Handle .schema <table>."""
+        table_name = arg.partition(' ')[0]
+        if not table_name:
+            print("Usage: .schema <table_name>")
+            return
         
-        elif command == '.help':
-            print("\nSimpleDB REPL Commands:")
-            print("  .exit, .quit     - Exit the REPL")
-            print("  .tables          - List all tables")
-            print("  .schema <table>  - Show table schema")
-            print("  .help            - Show this help message")
-            print("\nSQL Commands:")
-            print("  CREATE TABLE ... - Create a new table")
-            print("  DROP TABLE ...   - Drop a table")
-            print("  INSERT INTO ...  - Insert a row")
-            print("  SELECT ...       - Query data")
-            print("  UPDATE ...       - Update rows")
-            print("  DELETE FROM ...  - Delete rows")
-            print("\nEnd SQL statements with a semicolon (;)")
-            return True
+        try:
+            table = self.db.get_table(table_name)
+        except SimpleDBException as e:
+            print(f"Error: {e}")
+            return
         
-        return False
+        lines = [f"\nTable: {table.name}", "Columns:"]
+        for col in table.columns:
+            col_def = f"  - {col['name']} {col['type']}"
+            if col['type'] == 'VARCHAR':
+                col_def += f"({col.get('length', 255)})"
+            if 'constraints' in col:
+                col_def += f" [{', '.join(col['constraints'])}]"
+            lines.append(col_def)
+        self._write_lines(lines)
+    
+    def _flushcache(self, arg: str):
+        """Handle .flushcache."""
+        self.executor.clear_plan_cache()
+        print("Query cache cleared.")
+    
+    def _help(self, arg: str):
+        """Handle .help."""
+        self._write_lines(self.HELP_LINES)
+    
+    def _write_lines(self, lines: list):
+        """Write several lines to stdout in one call."""
+        sys.stdout.write('\n'.join(lines) + '\n')
     
     def run(self):
         """Start the REPL."""
-        print("=" * 60)
-        print("SimpleDB - Interactive SQL Shell")
-        print("=" * 60)
-        print("Type .help for help, .exit to quit")
-        print()
+        self._write_lines([
+            "=" * 60,
+            "SimpleDB - Interactive SQL Shell",
+            "=" * 60,
+            "Type .help for help, .exit to quit",
+            "",
+        ])
         
         buffer = []
         
@@ -163,18 +192,16 @@ class REPL:
                         if 'rows' in result:
                             # SELECT query
                             self.print_table(result['columns'], result['rows'])
+                            print()
                         else:
                             # Other queries
-                            print(result.get('message', 'Success'))
+                            self._write_lines([result.get('message', 'Success'), ""])
                     else:
-                        print(f"Error: {result['error']}")
-                    
-                    print()
+                        self._write_lines([f"Error: {result['error']}", ""])
             
             except KeyboardInterrupt:
-                print("\nInterrupted. Type .exit to quit.")
+                self._write_lines(["\nInterrupted. Type .exit to quit.", ""])
                 buffer = []
-                print()
             
             except EOFError:
                 print("\nGoodbye!")
@@ -4,23 +4,232 @@ Storage engine for SimpleDB.
 Manages tables, rows, indexes, and persistence.
 """
 
+import heapq
 import json
+import operator
 import os
-from typing import Dict, List, Any, Optional
+import sys
+from bisect import bisect_left, insort
+from itertools import compress, islice, repeat
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 from .exceptions import (
     TableNotFoundError, PrimaryKeyViolation, UniqueConstraintViolation,
     NotNullViolation, DataTypeError, ColumnNotFoundError
 )
 
+try:
+    import orjson
+except ImportError:  # optional - the standard json module is used instead
+    orjson = None
+
+
+# WHERE operators mapped to their comparison functions
+COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# Stand-ins for NULL when sorting, so NULLs sort first (ASC) and never
+# get compared against values of a different type
+NULL_SORT_KEYS = {
+    'INT': float('-inf'),
+    'VARCHAR': '',
+    'BOOLEAN': False,
+}
+
+def dump_json(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def load_json(data: bytes) -> Any:
+    """Parse JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# String spellings accepted for BOOLEAN columns
+BOOLEAN_STRINGS = {
+    'TRUE': True, 'true': True, '1': True, 'YES': True, 'yes': True,
+    'FALSE': False, 'false': False, '0': False, 'NO': False, 'no': False,
+}
+
+
+def compile_condition(cond: Dict[str, Any]) -> Callable[[Any], bool]:
+    """Bind a condition's operator and value into a test on a column value."""
+    op = cond['operator']
+    value = cond['value']
+    compare = COMPARISONS.get(op)
+    if compare is None:
+        raise DataTypeError(f"Unknown operator: {op}")
+    
+    if op in ('=', '!='):
+        return lambda row_value: compare(row_value, value)
+    if value is None:
+        # Ordering comparisons against NULL are never true
+        return lambda row_value: False
+    return lambda row_value: row_value is not None and compare(row_value, value)
+
+
+def compile_scan(conditions: List[Dict[str, Any]]) -> Callable[..., Iterator[int]]:
+    """Generate a Python generator scanning column vectors for a WHERE chain.
+    
+    The generated `scan(live, values, c0, c1, ...)` walks the live row
+    indexes in step with one value vector per referenced column (named in
+    its `columns` attribute) and yields the indexes that match - one fused
+    loop with no per-row function calls or dict lookups. Conditions combine
+    left to right exactly like _evaluate_conditions, with `and`/`or`
+    short-circuiting. Literals are never inlined: `values` holds one per
+    condition, in order, so a scan is shared by every chain of its shape.
+    """
+    names: List[str] = []
+    columns: List[str] = []
+    expr = None
+    current_logic = 'AND'
+    
+    for cond in conditions:
+        if 'logic' in cond:
+            current_logic = cond['logic']
+            continue
+        
+        op = cond['operator']
+        if op not in COMPARISONS:
+            raise DataTypeError(f"Unknown operator: {op}")
+        
+        name = f"v{len(names)}"
+        names.append(name)
+        if cond['column'] not in columns:
+            columns.append(cond['column'])
+        cell = f"a{columns.index(cond['column'])}"
+        if op in ('=', '!='):
+            test = f"{cell} {'==' if op == '=' else '!='} {name}"
+        elif cond['value'] is None:
+            test = "False"
+        else:
+            test = f"{cell} is not None and {cell} {op} {name}"
+        
+        if expr is None:
+            expr = f"({test})" if current_logic == 'AND' else "True"
+        else:
+            expr = f"({expr} {current_logic.lower()} ({test}))"
+    
+    cells = "".join(f", a{k}" for k in range(len(columns)))
+    vectors = "".join(f", c{k}" for k in range(len(columns)))
+    unpack = f"    {', '.join(names)}, = values\n" if names else ""
+    source = (
+        f"def scan(live, values{vectors}):\n"
+        f"{unpack}"
+        f"    for i{cells} in zip(live{vectors}):\n"
+        f"        if {expr or 'True'}:\n"
+        f"            yield i\n"
+    )
+    namespace = {}
+    exec(compile(source, '<where>', 'exec'), namespace)
+    scan = namespace['scan']
+    scan.columns = tuple(columns)
+    return scan
+
+
+def compile_validator(column: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Bind a column's type rules into a function validating one value."""
+    col_type = column['type']
+    
+    if col_type == 'INT':
+        def validate_int(value):
+            # bool is an int subclass and stays accepted, as it always was
+            if value is None or isinstance(value, int):
+                return value
+            try:
+                return int(value)
+            except (ValueError, TypeError):
+                raise DataTypeError(f"Cannot convert {value!r} to INT")
+        return validate_int
+    
+    if col_type == 'VARCHAR':
+        max_length = column.get('length', 255)
+        constraints = column.get('constraints', [])
+        
+        if 'PRIMARY KEY' in constraints or 'UNIQUE' in constraints:
+            # Indexed keys are interned so the row and its index entry share
+            # one string and dict probes can match on identity
+            def validate_indexed_varchar(value):
+                if value is None:
+                    return None
+                if type(value) is not str:
+                    value = str(value)
+                if len(value) > max_length:
+                    raise DataTypeError(f"String too long for VARCHAR({max_length}): {len(value)} chars")
+                return sys.intern(value)
+            return validate_indexed_varchar
+        
+        def validate_varchar(value):
+            if value is None:
+                return None
+            if not isinstance(value, str):
+                value = str(value)
+            if len(value) > max_length:
+                raise DataTypeError(f"String too long for VARCHAR({max_length}): {len(value)} chars")
+            return value
+        return validate_varchar
+    
+    if col_type == 'BOOLEAN':
+        def validate_boolean(value):
+            if value is None or value is True or value is False:
+                return value
+            if isinstance(value, str):
+                # Exact spellings hit directly; only odd casing pays for upper()
+                converted = BOOLEAN_STRINGS.get(value)
+                if converted is None:
+                    converted = BOOLEAN_STRINGS.get(value.upper())
+                if converted is not None:
+                    return converted
+            raise DataTypeError(f"Cannot convert {value!r} to BOOLEAN")
+        return validate_boolean
+    
+    def validate_unknown(value):
+        if value is None:
+            return None
+        raise DataTypeError(f"Unknown type: {col_type}")
+    return validate_unknown
+
 
 class Table:
     """Represents a database table with schema and data."""
     
+    # Times a mixed AND/OR WHERE chain must repeat before it is compiled
+    PREDICATE_COMPILE_THRESHOLD = 3
+    # Maximum number of compiled predicates kept per table
+    PREDICATE_CACHE_SIZE = 64
+    # Deleted row slots are compacted away once there are at least this
+    # many and they make up COMPACT_FRACTION of all slots
+    COMPACT_MIN_DELETED = 64
+    COMPACT_FRACTION = 0.25
+    
     def __init__(self, name: str, columns: List[Dict[str, Any]]):
+        # Interned once, so every row dict shares the same key objects
+        for col in columns:
+            col['name'] = sys.intern(col['name'])
         self.name = name
         self.columns = columns
+        self.column_names = tuple(col['name'] for col in columns)
+        self._columns_by_name = {col['name']: col for col in columns}
+        self._validators = {col['name']: compile_validator(col) for col in columns}
         self.rows = []
         self.indexes = {}  # column_name -> {value: row_index}
+        self._sorted = {}  # column_name -> [(value, row_index)] in value order
+        self._live_mask = bytearray()  # 1 per live row slot, 0 per deleted one
+        self._deleted = 0  # deleted row slots since the last compaction
+        self._live = None  # cached indexes of non-deleted rows
+        self._vectors = {}  # cached column_name -> (values of live rows, has NULLs)
+        self._predicates = {}  # WHERE chain signature -> compiled scan or hit count
+        self.version = 0  # bumped on every change to the rows
         self.primary_key = None
         self.unique_columns = set()
         self.not_null_columns = set()
@@ -33,6 +242,7 @@ class Table:
             if 'PRIMARY KEY' in constraints:
                 self.primary_key = col_name
                 self.indexes[col_name] = {}
+                self._sorted[col_name] = []
                 self.not_null_columns.add(col_name)
             
             if 'UNIQUE' in constraints:
@@ -42,61 +252,73 @@ class Table:
             
             if 'NOT NULL' in constraints:
                 self.not_null_columns.add(col_name)
+        
+        # UNIQUE columns paired with their indexes for validate_row
+        self._unique_indexes = [(col_name, self.indexes[col_name]) for col_name in self.unique_columns]
+        self._insert_checks = self._compile_insert_checks()
+    
+    def _compile_insert_checks(self) -> List[Callable[[Dict[str, Any]], None]]:
+        """Bind the NOT NULL / PRIMARY KEY / UNIQUE checks for new rows to the schema.
+        
+        A new row has exactly the table's columns and no index entry of its
+        own, so the checks skip validate_row's column and self-match tests.
+        """
+        checks = []
+        
+        not_null = tuple(self.not_null_columns)
+        if not_null:
+            # One C-level tuple build and membership test in the common case
+            values = operator.itemgetter(*not_null) if len(not_null) > 1 else (lambda row: (row[not_null[0]],))
+            
+            def check_not_null(row):
+                if None in values(row):
+                    for col_name in not_null:
+                        if row[col_name] is None:
+                            raise NotNullViolation(f"Column '{col_name}' cannot be NULL")
+            checks.append(check_not_null)
+        
+        if self.primary_key:
+            pk, pk_index = self.primary_key, self.indexes[self.primary_key]
+            
+            def check_primary_key(row):
+                value = row[pk]
+                if value is not None and value in pk_index:
+                    raise PrimaryKeyViolation(f"Primary key '{pk}' value {value} already exists")
+            checks.append(check_primary_key)
+        
+        for col_name, index in self._unique_indexes:
+            def check_unique(row, col_name=col_name, index=index):
+                value = row[col_name]
+                if value is not None and value in index:
+                    raise UniqueConstraintViolation(f"UNIQUE constraint violated for column '{col_name}' value {value}")
+            checks.append(check_unique)
+        
+        return checks
     
     def get_column(self, name: str) -> Optional[Dict[str, Any]]:
         """Get column definition by name."""
-        for col in self.columns:
-            if col['name'] == name:
-                return col
-        return None
+        return self._columns_by_name.get(name)
     
     def validate_value(self, column: Dict[str, Any], value: Any) -> Any:
         """Validate and convert value to correct type."""
-        if value is None:
-            return None
-        
-        col_type = column['type']
-        
-        if col_type == 'INT':
-            if not isinstance(value, int):
-                try:
-                    return int(value)
-                except (ValueError, TypeError):
-                    raise DataTypeError(f"Cannot convert {value!r} to INT")
-            return value
-        
-        elif col_type == 'VARCHAR':
-            if not isinstance(value, str):
-                value = str(value)
-            max_length = column.get('length', 255)
-            if len(value) > max_length:
-                raise DataTypeError(f"String too long for VARCHAR({max_length}): {len(value)} chars")
-            return value
-        
-        elif col_type == 'BOOLEAN':
-            if not isinstance(value, bool):
-                if isinstance(value, str):
-                    if value.upper() in ('TRUE', '1', 'YES'):
-                        return True
-                    elif value.upper() in ('FALSE', '0', 'NO'):
-                        return False
-                raise DataTypeError(f"Cannot convert {value!r} to BOOLEAN")
-            return value
-        
-        else:
-            raise DataTypeError(f"Unknown type: {col_type}")
+        col_name = column['name']
+        if self._columns_by_name.get(col_name) is column:
+            return self._validators[col_name](value)
+        return compile_validator(column)(value)
     
     def validate_row(self, row: Dict[str, Any], row_index: Optional[int] = None):
         """Validate a row against schema and constraints."""
-        # Check all columns exist
-        for col_name in row.keys():
-            if not self.get_column(col_name):
-                raise ColumnNotFoundError(f"Column '{col_name}' does not exist in table '{self.name}'")
+        # Check all columns exist - one C-level subset test in the common case
+        if not row.keys() <= self._columns_by_name.keys():
+            for col_name in row.keys():
+                if col_name not in self._columns_by_name:
+                    raise ColumnNotFoundError(f"Column '{col_name}' does not exist in table '{self.name}'")
         
         # Check NOT NULL constraints
-        for col_name in self.not_null_columns:
-            if row.get(col_name) is None:
-                raise NotNullViolation(f"Column '{col_name}' cannot be NULL")
+        if self.not_null_columns:
+            for col_name in self.not_null_columns:
+                if row.get(col_name) is None:
+                    raise NotNullViolation(f"Column '{col_name}' cannot be NULL")
         
         # Check PRIMARY KEY constraint
         if self.primary_key:
@@ -107,159 +329,534 @@ class Table:
                     raise PrimaryKeyViolation(f"Primary key '{self.primary_key}' value {pk_value} already exists")
         
         # Check UNIQUE constraints
-        for col_name in self.unique_columns:
-            if col_name in row and row[col_name] is not None:
-                if col_name in self.indexes and row[col_name] in self.indexes[col_name]:
-                    existing_index = self.indexes[col_name][row[col_name]]
-                    if row_index is None or existing_index != row_index:
-                        raise UniqueConstraintViolation(f"UNIQUE constraint violated for column '{col_name}' value {row[col_name]}")
+        for col_name, index in self._unique_indexes:
+            value = row.get(col_name)
+            if value is not None:
+                existing_index = index.get(value)
+                if existing_index is not None and (row_index is None or existing_index != row_index):
+                    raise UniqueConstraintViolation(f"UNIQUE constraint violated for column '{col_name}' value {value}")
     
     def insert_row(self, values: Dict[str, Any]) -> int:
         """Insert a new row and return its index."""
         # Validate and convert types
         row = {}
-        for col in self.columns:
-            col_name = col['name']
-            value = values.get(col_name)
-            row[col_name] = self.validate_value(col, value)
+        for col_name, validate in self._validators.items():
+            row[col_name] = validate(values.get(col_name))
         
         # Validate constraints
-        self.validate_row(row)
+        for check in self._insert_checks:
+            check(row)
         
         # Add row
         row_index = len(self.rows)
         self.rows.append(row)
+        self._live_mask.append(1)
+        self._append_to_vectors(row_index, row)
         
         # Update indexes
         for col_name in self.indexes:
             value = row.get(col_name)
             if value is not None:
                 self.indexes[col_name][value] = row_index
+        for col_name, entries in self._sorted.items():
+            # Ascending keys (the usual primary key) land at the end in O(log N)
+            insort(entries, (row[col_name], row_index))
         
         return row_index
     
+    def insert_rows(self, rows_values: List[Dict[str, Any]],
+                    ignore_conflicts: bool = False) -> List[int]:
+        """Insert several rows and return their indexes, keeping none if one fails.
+        
+        With `ignore_conflicts`, rows whose PRIMARY KEY / UNIQUE values are
+        already taken are skipped instead of failing the batch.
+        """
+        row_indexes = []
+        try:
+            for values in rows_values:
+                try:
+                    row_indexes.append(self.insert_row(values))
+                except (PrimaryKeyViolation, UniqueConstraintViolation):
+                    if not ignore_conflicts:
+                        raise
+        except Exception:
+            self.delete_rows(row_indexes)
+            raise
+        return row_indexes
+    
     def update_row(self, row_index: int, updates: Dict[str, Any]):
         """Update an existing row."""
-        if row_index < 0 or row_index >= len(self.rows):
-            return
-        
-        old_row = self.rows[row_index].copy()
-        new_row = old_row.copy()
-        
+        self.update_rows([row_index], updates)
+    
+    def update_rows(self, row_indexes: List[int], updates: Dict[str, Any]):
+        """Update several rows, validating the new values only once."""
         # Apply updates with type validation
+        validated = {}
         for col_name, value in updates.items():
-            col = self.get_column(col_name)
-            if not col:
+            validate = self._validators.get(col_name)
+            if validate is None:
                 raise ColumnNotFoundError(f"Column '{col_name}' does not exist")
-            new_row[col_name] = self.validate_value(col, value)
-        
-        # Validate constraints
-        self.validate_row(new_row, row_index)
-        
-        # Update indexes (remove old values)
-        for col_name in self.indexes:
+            validated[col_name] = validate(value)
+        
+        # Only indexed columns the update touches need index maintenance
+        indexed = [(col_name, self.indexes[col_name]) for col_name in validated if col_name in self.indexes]
+        nulled = [col_name for col_name in self.not_null_columns
+                  if col_name in validated and validated[col_name] is None]
+        
+        updated = []
+        try:
+            for row_index in row_indexes:
+                if 0 <= row_index < len(self.rows) and self.rows[row_index] is not None:
+                    if nulled:
+                        raise NotNullViolation(f"Column '{nulled[0]}' cannot be NULL")
+                    self._apply_update(row_index, validated, indexed)
+                    updated.append(row_index)
+        finally:
+            self._update_vectors(updated, validated)
+    
+    def _apply_update(self, row_index: int, validated: Dict[str, Any],
+                      indexed: List[Tuple[str, Dict[Any, int]]]):
+        """Write already-validated values into a row, maintaining indexes."""
+        # The untouched columns already passed validation, so only the
+        # updated indexed columns can violate PRIMARY KEY / UNIQUE
+        for col_name, index in indexed:
+            value = validated[col_name]
+            existing_index = None if value is None else index.get(value)
+            if existing_index is not None and existing_index != row_index:
+                if col_name == self.primary_key:
+                    raise PrimaryKeyViolation(f"Primary key '{col_name}' value {value} already exists")
+                raise UniqueConstraintViolation(f"UNIQUE constraint violated for column '{col_name}' value {value}")
+        
+        # Update row - a new dict rather than in place, since SELECT *
+        # results hand out the stored row dicts
+        old_row = self.rows[row_index]
+        new_row = self.rows[row_index] = {**old_row, **validated}
+        
+        # Update indexes - move only the entries whose value changed
+        for col_name, index in indexed:
             old_value = old_row.get(col_name)
-            if old_value is not None and old_value in self.indexes[col_name]:
-                del self.indexes[col_name][old_value]
-        
-        # Update row
-        self.rows[row_index] = new_row
-        
-        # Update indexes (add new values)
-        for col_name in self.indexes:
-            new_value = new_row.get(col_name)
+            new_value = new_row[col_name]
+            if old_value == new_value:
+                continue
+            if old_value is not None:
+                index.pop(old_value, None)
             if new_value is not None:
-                self.indexes[col_name][new_value] = row_index
+                index[new_value] = row_index
+            entries = self._sorted.get(col_name)
+            if entries is not None:
+                del entries[bisect_left(entries, (old_value, row_index))]
+                insort(entries, (new_value, row_index))
     
     def delete_row(self, row_index: int):
         """Delete a row by index."""
-        if row_index < 0 or row_index >= len(self.rows):
-            return
-        
-        row = self.rows[row_index]
-        
-        # Remove from indexes
-        for col_name in self.indexes:
-            value = row.get(col_name)
-            if value is not None and value in self.indexes[col_name]:
-                del self.indexes[col_name][value]
-        
-        # Mark as deleted (set to None to maintain indexes)
-        self.rows[row_index] = None
+        self.delete_rows([row_index])
     
-    def find_rows(self, conditions: Optional[List[Dict[str, Any]]] = None) -> List[int]:
-        """Find row indexes matching conditions."""
+    def delete_rows(self, row_indexes: List[int]):
+        """Delete several rows in a single pass."""
+        rows = self.rows
+        live_mask = self._live_mask
+        indexes = list(self.indexes.items())
+        sorted_columns = list(self._sorted.items())
+        
+        for row_index in row_indexes:
+            if row_index < 0 or row_index >= len(rows):
+                continue
+            row = rows[row_index]
+            if row is None:
+                continue
+            
+            # Remove from indexes
+            for col_name, index in indexes:
+                value = row.get(col_name)
+                if value is not None:
+                    index.pop(value, None)
+            for col_name, entries in sorted_columns:
+                del entries[bisect_left(entries, (row[col_name], row_index))]
+            
+            # Mark as deleted (set to None to maintain indexes)
+            rows[row_index] = None
+            live_mask[row_index] = 0
+            self._deleted += 1
+        
+        self._remove_from_vectors()
+        if self._deleted >= self.COMPACT_MIN_DELETED and self._deleted >= len(rows) * self.COMPACT_FRACTION:
+            self._compact()
+    
+    def _compact(self):
+        """Drop deleted row slots, renumbering the live rows in their order."""
+        old_live = self._live_indexes()
+        renumber = dict(zip(old_live, range(len(old_live))))
+        self.rows = list(map(self.rows.__getitem__, old_live))
+        self._live_mask = bytearray(b'\x01') * len(self.rows)
+        self._deleted = 0
+        # Column vectors already hold the live rows in this order
+        self._live = list(range(len(self.rows)))
+        
+        # Indexes are rewritten in place - _unique_indexes shares them
+        for index in self.indexes.values():
+            moved = {value: renumber[row_index] for value, row_index in index.items()}
+            index.clear()
+            index.update(moved)
+        for entries in self._sorted.values():
+            entries[:] = [(value, renumber[row_index]) for value, row_index in entries]
+    
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the live rows, skipping deleted slots."""
+        return compress(self.rows, self._live_mask)
+    
+    def find_rows(self, conditions: Optional[List[Dict[str, Any]]] = None,
+                  limit: Optional[int] = None) -> List[int]:
+        """Find row indexes matching conditions, stopping after `limit` matches."""
         if conditions is None:
             # Return all non-deleted rows
-            return [i for i, row in enumerate(self.rows) if row is not None]
+            return self._live_indexes()[:limit]
+        conditions = self._coerce_conditions(conditions)
+        
+        # AND-only chains use compiled predicates and the indexes
+        if not any(cond.get('logic') == 'OR' for cond in conditions):
+            return self._find_rows_and(conditions, limit)
+        
+        # Without a limit every row is tested anyway, so evaluate whole columns
+        if limit is None:
+            return self._scan_masks(conditions)
+        
+        # Chains that keep coming back are compiled to a fused column scan
+        scan = self._compiled_predicate(conditions)
+        if scan is not None:
+            values = [cond['value'] for cond in conditions if 'logic' not in cond]
+            vectors = [self._column_vector(column)[0] for column in scan.columns]
+            return list(islice(scan(self._live_indexes(), values, *vectors), limit))
         
         # Evaluate conditions
+        rows = self.rows
+        plan = self._condition_plan(conditions)
+        evaluate = self._evaluate_plan
         matching_indexes = []
-        for i, row in enumerate(self.rows):
-            if row is None:
-                continue
-            
-            if self._evaluate_conditions(row, conditions):
+        for i in self._live_indexes():
+            if evaluate(rows[i], plan):
                 matching_indexes.append(i)
+                if len(matching_indexes) == limit:
+                    break
         
         return matching_indexes
     
-    def _evaluate_conditions(self, row: Dict[str, Any], conditions: List[Dict[str, Any]]) -> bool:
-        """Evaluate WHERE conditions for a row."""
-        result = True
-        current_logic = 'AND'
+    def _coerce_conditions(self, conditions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cast WHERE literals to their column's type once, before any row is tested.
+        
+        Literals are converted the way INSERT converts values, so e.g.
+        id = '2' matches the stored 2. Values that don't convert, and floats
+        (which an INT cast would truncate), are compared as they are.
+        """
+        coerced = conditions
+        for i, cond in enumerate(conditions):
+            value = cond.get('value')
+            validate = self._validators.get(cond.get('column'))
+            if validate is None or value is None or type(value) is float:
+                continue
+            try:
+                cast = validate(value)
+            except DataTypeError:
+                continue
+            if type(cast) is not type(value):
+                if coerced is conditions:
+                    coerced = list(conditions)
+                coerced[i] = {**cond, 'value': cast}
+        return coerced
+    
+    def sort_row_indexes(self, row_indexes: List[int], column: str, reverse: bool = False,
+                         limit: Optional[int] = None) -> List[int]:
+        """Order row indexes by a column, keeping only the first `limit` if given."""
+        col = self.get_column(column)
+        if col is None:
+            # Every value is NULL, and the sort is stable
+            return list(row_indexes[:limit] if limit else row_indexes)
+        
+        # Sort keys come from the cached column vector when every live row
+        # is being sorted; a subset reads its rows' values directly
+        live = self._live_indexes()
+        entries = self._sorted.get(column)
+        if entries is not None and len(row_indexes) == len(live):
+            # The primary key is kept in order already (and is never NULL
+            # nor repeated), so ORDER BY is a slice of at most `limit` entries
+            if reverse:
+                entries = reversed(entries[-limit:]) if limit else reversed(entries)
+            elif limit:
+                entries = entries[:limit]
+            return [row_index for _, row_index in entries]
+        if len(row_indexes) == len(live):
+            targets = live
+            keys, has_nulls = self._column_vector(column)
+        else:
+            targets = row_indexes
+            keys = list(map(operator.itemgetter(column), map(self.rows.__getitem__, row_indexes)))
+            has_nulls = None in keys
+        if has_nulls:
+            null_key = NULL_SORT_KEYS.get(col['type'], '')
+            keys = [null_key if value is None else value for value in keys]
+        
+        # Top-K: a heap is O(N log K) instead of a full O(N log N) sort
+        positions = range(len(keys))
+        if limit and limit < len(keys):
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            positions = pick(limit, positions, key=keys.__getitem__)
+        else:
+            positions = sorted(positions, key=keys.__getitem__, reverse=reverse)
+        return list(map(targets.__getitem__, positions))
+    
+    def _compiled_predicate(self, conditions: List[Dict[str, Any]]) -> Optional[Callable[..., Iterator[int]]]:
+        """Get the compiled scan for a WHERE chain once its shape has repeated enough.
+        
+        Chains are keyed by columns, operators and logic only (a NULL literal
+        compiles differently, so that is part of the shape too); the literal
+        values are passed to the scan when it runs. Hit counters and scans
+        share one LRU bound of PREDICATE_CACHE_SIZE entries.
+        """
+        signature = tuple(
+            cond['logic'] if 'logic' in cond else
+            (cond['column'], cond['operator'], cond['value'] is None)
+            for cond in conditions
+        )
+        
+        # Re-inserting keeps the dict in least-recently-used order
+        entry = self._predicates.pop(signature, 0)
+        if not callable(entry):
+            entry += 1
+            if entry >= self.PREDICATE_COMPILE_THRESHOLD:
+                for cond in conditions:
+                    if 'logic' not in cond and self.get_column(cond['column']) is None:
+                        raise ColumnNotFoundError(f"Column '{cond['column']}' not found")
+                entry = compile_scan(conditions)
+        
+        if len(self._predicates) >= self.PREDICATE_CACHE_SIZE:
+            del self._predicates[next(iter(self._predicates))]
+        self._predicates[signature] = entry
+        return entry if callable(entry) else None
+    
+    def index_lookup(self, column: str, value: Any) -> Optional[int]:
+        """Get the row index holding `value` in an indexed column, if any."""
+        index = self.indexes.get(column)
+        if index is None or value is None:
+            return None
+        return index.get(value)
+    
+    def _find_rows_and(self, conditions: List[Dict[str, Any]], limit: Optional[int] = None) -> List[int]:
+        """Find rows matching an AND-only condition chain."""
+        leaves = [cond for cond in conditions if 'logic' not in cond]
+        if not leaves:
+            return self.find_rows(None, limit)
+        
+        for cond in leaves:
+            if self.get_column(cond['column']) is None:
+                raise ColumnNotFoundError(f"Column '{cond['column']}' not found")
+        
+        # Equality on a PRIMARY KEY / UNIQUE column anywhere in the chain
+        # narrows the search to at most one row
+        probe = next((
+            position for position, cond in enumerate(leaves)
+            if cond['operator'] == '=' and cond['column'] in self.indexes and cond['value'] is not None
+        ), None)
+        if probe is None:
+            tests = [(cond['column'], compile_condition(cond)) for cond in leaves]
+            return self._scan_columns(leaves, tests, limit)
+        
+        row_index = self.index_lookup(leaves[probe]['column'], leaves[probe]['value'])
+        if row_index is None:
+            return []
+        
+        # The index already matched the probed condition, so only the
+        # residual ones are checked - a lone `pk = value` compiles nothing
+        row = self.rows[row_index]
+        for position, cond in enumerate(leaves):
+            if position != probe and not compile_condition(cond)(row[cond['column']]):
+                return []
+        return [row_index]
+    
+    def _scan_columns(self, leaves: List[Dict[str, Any]],
+                      tests: List[Tuple[str, Callable[[Any], bool]]],
+                      limit: Optional[int] = None) -> List[int]:
+        """Filter an AND-only chain column by column over the cached vectors.
+        
+        Each predicate narrows a list of positions with map()/compress(), so
+        the per-row comparisons run in C instead of evaluating row dicts.
+        The last predicate is evaluated lazily and stops after `limit` hits.
+        """
+        live = self._live_indexes()
+        selected = range(len(live))
+        last = len(leaves) - 1
+        
+        for position, (cond, (column, test)) in enumerate(zip(leaves, tests)):
+            values, has_nulls = self._column_vector(column)
+            if len(selected) != len(values):
+                values = list(map(values.__getitem__, selected))
+            
+            op = cond['operator']
+            value = cond['value']
+            if op in ('=', '!=') or (value is not None and not has_nulls):
+                matches = map(COMPARISONS[op], values, repeat(value))
+            else:
+                matches = map(test, values)
+            if position == last:
+                selected = list(islice(compress(selected, matches), limit))
+            else:
+                selected = list(compress(selected, matches))
+            if not selected:
+                return []
         
+        return list(map(live.__getitem__, selected))
+    
+    def _scan_masks(self, conditions: List[Dict[str, Any]]) -> List[int]:
+        """Evaluate a mixed AND/OR chain as one boolean mask per predicate.
+        
+        Each mask is computed over a cached column vector and the masks are
+        folded left to right with and/or, matching _evaluate_conditions,
+        so all the per-row work runs in C. The masks are lazy iterators, so
+        the whole chain is fused into the single final compress() pass
+        without materializing a list per predicate.
+        """
+        mask = None
+        current_logic = 'AND'
         for cond in conditions:
             if 'logic' in cond:
                 current_logic = cond['logic']
                 continue
             
             column = cond['column']
-            operator = cond['operator']
-            value = cond['value']
-            
-            if column not in row:
+            if self.get_column(column) is None:
                 raise ColumnNotFoundError(f"Column '{column}' not found")
+            test = compile_condition(cond)
+            values, has_nulls = self._column_vector(column)
             
-            row_value = row[column]
-            
-            # Evaluate condition
-            if operator == '=':
-                condition_result = row_value == value
-            elif operator == '!=':
-                condition_result = row_value != value
-            elif operator == '<':
-                condition_result = row_value is not None and value is not None and row_value < value
-            elif operator == '<=':
-                condition_result = row_value is not None and value is not None and row_value <= value
-            elif operator == '>':
-                condition_result = row_value is not None and value is not None and row_value > value
-            elif operator == '>=':
-                condition_result = row_value is not None and value is not None and row_value >= value
+            op = cond['operator']
+            value = cond['value']
+            if op in ('=', '!=') or (value is not None and not has_nulls):
+                matches = map(COMPARISONS[op], values, repeat(value))
             else:
-                raise DataTypeError(f"Unknown operator: {operator}")
+                matches = map(test, values)
             
-            # Combine with previous result
-            if current_logic == 'AND':
-                result = result and condition_result
-            else:  # OR
-                result = result or condition_result
+            if mask is None:
+                mask = matches
+            elif current_logic == 'AND':
+                mask = map(operator.and_, mask, matches)
+            else:
+                mask = map(operator.or_, mask, matches)
         
-        return result
+        live = self._live_indexes()
+        if mask is None:
+            return list(live)
+        return list(compress(live, mask))
+    
+    def _live_indexes(self) -> List[int]:
+        """Get the indexes of all non-deleted rows."""
+        if self._live is None:
+            self._live = list(compress(range(len(self.rows)), self._live_mask))
+        return self._live
+    
+    def _column_vector(self, column: str) -> Tuple[List[Any], bool]:
+        """Get a column's values for all live rows, plus whether any are NULL."""
+        vector = self._vectors.get(column)
+        if vector is None:
+            live_rows = map(self.rows.__getitem__, self._live_indexes())
+            values = list(map(operator.itemgetter(column), live_rows))
+            vector = self._vectors[column] = (values, None in values)
+        return vector
+    
+    def _append_to_vectors(self, row_index: int, row: Dict[str, Any]):
+        """Extend the cached column vectors with a newly inserted row."""
+        self.version += 1
+        if self._live is None:
+            return
+        self._live.append(row_index)
+        for column, (values, has_nulls) in self._vectors.items():
+            value = row[column]
+            values.append(value)
+            if value is None and not has_nulls:
+                self._vectors[column] = (values, True)
+    
+    def _update_vectors(self, row_indexes: List[int], updates: Dict[str, Any]):
+        """Write updated values into the cached column vectors in place."""
+        self.version += 1
+        if self._live is None or not row_indexes:
+            return
+        live = self._live
+        for column, value in updates.items():
+            vector = self._vectors.get(column)
+            if vector is None:
+                continue
+            values, has_nulls = vector
+            for row_index in row_indexes:
+                values[bisect_left(live, row_index)] = value
+            # Overwriting the last NULL leaves has_nulls set, which only
+            # costs the NULL-safe comparison path
+            if value is None and not has_nulls:
+                self._vectors[column] = (values, True)
+    
+    def _remove_from_vectors(self):
+        """Drop newly deleted rows from the cached column vectors."""
+        self.version += 1
+        live = self._live
+        if live is None:
+            return
+        # Filter the cached positions in C rather than re-reading every row;
+        # a column losing its last NULL keeps has_nulls set, which is harmless
+        keep = bytes(map(self._live_mask.__getitem__, live))
+        self._live = list(compress(live, keep))
+        for column, (values, has_nulls) in self._vectors.items():
+            self._vectors[column] = (list(compress(values, keep)), has_nulls)
+    
+    def _condition_plan(self, conditions: List[Dict[str, Any]]) -> List[Tuple[bool, str, Callable[[Any], bool]]]:
+        """Resolve a WHERE chain once into (joined by AND, column, test) steps."""
+        plan = []
+        current_logic = 'AND'
+        for cond in conditions:
+            if 'logic' in cond:
+                current_logic = cond['logic']
+                continue
+            
+            column = cond['column']
+            if self.get_column(column) is None:
+                raise ColumnNotFoundError(f"Column '{column}' not found")
+            plan.append((current_logic == 'AND', column, compile_condition(cond)))
+        return plan
+    
+    @staticmethod
+    def _evaluate_plan(row: Dict[str, Any], plan: List[Tuple[bool, str, Callable[[Any], bool]]]) -> bool:
+        """Evaluate a resolved WHERE chain for a row, left to right."""
+        result = True
+        for is_and, column, test in plan:
+            # A false result can't be rescued by AND, nor a true one lost by
+            # OR, so the condition only runs when it can change the result
+            if is_and:
+                if result:
+                    result = test(row[column])
+            elif not result:
+                result = test(row[column])
+        return bool(result)
+    
+    def _evaluate_conditions(self, row: Dict[str, Any], conditions: List[Dict[str, Any]]) -> bool:
+        """Evaluate WHERE conditions for a row."""
+        return self._evaluate_plan(row, self._condition_plan(conditions))
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert table to dictionary for serialization."""
+        # Stored column by column, so each column name is written once per
+        # table instead of once per row
         return {
             'name': self.name,
             'columns': self.columns,
-            'rows': [row for row in self.rows if row is not None]
+            'data': {name: list(self._column_vector(name)[0]) for name in self.column_names}
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Table':
         """Create table from dictionary."""
         table = cls(data['name'], data['columns'])
-        for row in data['rows']:
+        if 'data' in data:
+            names = list(data['data'])
+            rows = (dict(zip(names, values)) for values in zip(*data['data'].values()))
+        else:
+            # Row-per-dict layout written by earlier versions
+            rows = data['rows']
+        for row in rows:
             table.insert_row(row)
         return table
 
@@ -270,6 +867,7 @@ class Database:
     def __init__(self, db_file: Optional[str] = None):
         self.tables = {}
         self.db_file = db_file
+        self._table_json = {}  # table name -> (table, version, serialized JSON)
         
         if db_file and os.path.exists(db_file):
             self.load()
@@ -304,12 +902,27 @@ class Database:
         if not self.db_file:
             return
         
-        data = {
-            'tables': {name: table.to_dict() for name, table in self.tables.items()}
-        }
-        
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Re-serialize only tables that changed since the last save; the
+        # rest reuse their cached JSON. Compact output - indentation
+        # roughly doubles the bytes written.
+        blobs = {}
+        for name, table in self.tables.items():
+            cached = self._table_json.get(name)
+            if cached is None or cached[0] is not table or cached[1] != table.version:
+                cached = (table, table.version, dump_json(table.to_dict()))
+            blobs[name] = cached
+        self._table_json = blobs
+        
+        payload = b'{"tables":{' + b','.join(
+            dump_json(name) + b':' + blob for name, (_, _, blob) in blobs.items()
+        ) + b'}}'
+        
+        # Write to a temp file and swap it in so a crash mid-save never
+        # leaves a truncated database behind.
+        tmp_file = self.db_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_file, self.db_file)
     
     def load(self):
         """Load database from file."""
@@ -320,8 +933,8 @@ class Database:
         if os.path.getsize(self.db_file) == 0:
             return
         
-        with open(self.db_file, 'r') as f:
-            data = json.load(f)
+        with open(self.db_file, 'rb') as f:
+            data = load_json(f.read())
         
         self.tables = {}
         for name, table_data in data.get('tables', {}).items():
@@ -5,25 +5,43 @@ Provides persistent storage using Supabase PostgreSQL instead of JSON files.
 """
 
 import os
+import uuid
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, List, Any, Optional
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Dict, Iterator, List, Any, Optional
 from .exceptions import (
-    TableNotFoundError, PrimaryKeyViolation, UniqueConstraintViolation,
-    NotNullViolation, DataTypeError, ColumnNotFoundError
+    SimpleDBException, TableNotFoundError, PrimaryKeyViolation,
+    UniqueConstraintViolation, NotNullViolation, DataTypeError, ColumnNotFoundError
 )
+from .storage import BOOLEAN_STRINGS
+
+# WHERE operators mapped to their PostgreSQL spelling
+SQL_OPERATORS = {
+    '=': '=',
+    '!=': '!=',
+    '<': '<',
+    '<=': '<=',
+    '>': '>',
+    '>=': '>='
+}
 
 
 class SupabaseTable:
     """Represents a database table backed by PostgreSQL."""
     
+    # Maximum number of built WHERE clauses kept per table
+    WHERE_CACHE_SIZE = 64
+    
     def __init__(self, name: str, columns: List[Dict[str, Any]], connection):
         self.name = name
         self.columns = columns
+        self.column_names = tuple(col['name'] for col in columns)
+        self._columns_by_name = {col['name']: col for col in columns}
         self.connection = connection
         self.primary_key = None
         self.unique_columns = set()
         self.not_null_columns = set()
+        self._where_cache = {}  # WHERE chain signature -> SQL clause
         
         # Process column constraints
         for col in columns:
@@ -42,10 +60,7 @@ class SupabaseTable:
     
     def get_column(self, name: str) -> Optional[Dict[str, Any]]:
         """Get column definition by name."""
-        for col in self.columns:
-            if col['name'] == name:
-                return col
-        return None
+        return self._columns_by_name.get(name)
     
     def _map_type_to_postgres(self, col_type: str, length: Optional[int] = None) -> str:
         """Map SimpleDB types to PostgreSQL types."""
@@ -112,10 +127,12 @@ class SupabaseTable:
         elif col_type == 'BOOLEAN':
             if not isinstance(value, bool):
                 if isinstance(value, str):
-                    if value.upper() in ('TRUE', '1', 'YES'):
-                        return True
-                    elif value.upper() in ('FALSE', '0', 'NO'):
-                        return False
+                    # Exact spellings hit directly; only odd casing pays for upper()
+                    converted = BOOLEAN_STRINGS.get(value)
+                    if converted is None:
+                        converted = BOOLEAN_STRINGS.get(value.upper())
+                    if converted is not None:
+                        return converted
                 raise DataTypeError(f"Cannot convert {value!r} to BOOLEAN")
             return value
         
@@ -126,7 +143,7 @@ class SupabaseTable:
         """Validate a row against schema and constraints."""
         # Check all columns exist
         for col_name in row.keys():
-            if not self.get_column(col_name):
+            if col_name not in self._columns_by_name:
                 raise ColumnNotFoundError(f"Column '{col_name}' does not exist in table '{self.name}'")
         
         # Check NOT NULL constraints
@@ -136,61 +153,110 @@ class SupabaseTable:
     
     def insert_row(self, values: Dict[str, Any]) -> int:
         """Insert a new row and return its ID."""
-        # Validate and convert types
-        row = {}
-        for col in self.columns:
-            col_name = col['name']
-            value = values.get(col_name)
-            row[col_name] = self.validate_value(col, value)
-        
-        # Validate constraints
-        self.validate_row(row)
-        
-        # Build INSERT query
-        columns = list(row.keys())
-        placeholders = [f'%s' for _ in columns]
-        values_list = [row[col] for col in columns]
+        rows = self.insert_rows([values])
+        return rows[0] if rows else {}
+    
+    def insert_rows(self, rows_values: List[Dict[str, Any]],
+                    ignore_conflicts: bool = False) -> List[Dict[str, Any]]:
+        """Insert several rows in a single statement and return them as stored.
         
-        sql = f'''
-            INSERT INTO "{self.name}" ({", ".join(f'"{col}"' for col in columns)})
-            VALUES ({", ".join(placeholders)})
-            RETURNING *
-        '''
+        With `ignore_conflicts`, rows hitting a PRIMARY KEY / UNIQUE value are
+        skipped by the server and left out of the result.
+        """
+        # Validate and convert types
+        rows = []
+        for values in rows_values:
+            row = {}
+            for col in self.columns:
+                col_name = col['name']
+                value = values.get(col_name)
+                row[col_name] = self.validate_value(col, value)
+            
+            # Validate constraints
+            self.validate_row(row)
+            rows.append(row)
+        
+        if not rows:
+            return []
+        
+        # Build INSERT query - execute_values expands VALUES %s into pages
+        # of rows, so N rows cost one round trip per page instead of N
+        columns = self.column_names
+        column_list = ", ".join(f'"{col}"' for col in columns)
+        values_list = [tuple(row[col] for col in columns) for row in rows]
+        conflict = ' ON CONFLICT DO NOTHING' if ignore_conflicts else ''
+        
+        # Plain parameterized SQL rather than PREPARE - behind a transaction
+        # pooler a prepared statement may not exist on the next session
+        if len(rows) == 1:
+            placeholders = ", ".join(["%s"] * len(columns))
+            sql = f'INSERT INTO "{self.name}" ({column_list}) VALUES ({placeholders}){conflict} RETURNING *'
+        else:
+            sql = f'INSERT INTO "{self.name}" ({column_list}) VALUES %s{conflict} RETURNING *'
         
-        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            try:
-                cursor.execute(sql, values_list)
+        try:
+            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                if len(rows) == 1:
+                    cursor.execute(sql, values_list[0])
+                    result = cursor.fetchall()
+                else:
+                    result = execute_values(cursor, sql, values_list, page_size=1000, fetch=True)
                 self.connection.commit()
-                result = cursor.fetchone()
-                return dict(result) if result else {}
-            except psycopg2.IntegrityError as e:
-                self.connection.rollback()
-                if 'duplicate key' in str(e).lower():
-                    if 'primary key' in str(e).lower():
-                        raise PrimaryKeyViolation(f"Primary key violation: {e}")
-                    else:
-                        raise UniqueConstraintViolation(f"Unique constraint violation: {e}")
-                raise
+                return [dict(row) for row in result]
+        except psycopg2.IntegrityError as e:
+            self.connection.rollback()
+            if 'duplicate key' in str(e).lower():
+                # PostgreSQL names the violated constraint, e.g. "tasks_pkey"
+                if 'primary key' in str(e).lower() or f'"{self.name}_pkey"' in str(e):
+                    raise PrimaryKeyViolation(f"Primary key violation: {e}")
+                else:
+                    raise UniqueConstraintViolation(f"Unique constraint violation: {e}")
+            raise
     
     @property
     def rows(self) -> List[Dict[str, Any]]:
-        """Fetch all rows for compatibility with QueryExecutor."""
-        # For compatibility with QueryExecutor which expects table.rows[i]
-        # We fetch all rows and return them as a list.
-        # This is not efficient for large tables but necessary for compatibility.
-        sql = f'SELECT * FROM "{self.name}"'
-        if self.primary_key:
-            sql += f' ORDER BY "{self.primary_key}" ASC'
-        
-        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(sql)
-            return [dict(row) for row in cursor.fetchall()]
+        """Fetch all rows, in primary key order."""
+        return list(self.iter_rows())
 
-    def find_rows(self, conditions: Optional[List[Dict[str, Any]]] = None) -> List[int]:
-        """Find rows matching conditions. Returns list of row indexes."""
-        # QueryExecutor expects list of integers (indexes)
-        # We fetch matching rows and return their range
-        sql = f'SELECT * FROM "{self.name}"'
+    def iter_rows(self, conditions: Optional[List[Dict[str, Any]]] = None,
+                  limit: Optional[int] = None, batch: int = 10000) -> Iterator[Dict[str, Any]]:
+        """Stream the rows matching conditions through a server-side cursor, batch rows at a time."""
+        # A named cursor keeps the result set on the server, so only one
+        # batch is resident in Python however large the table is
+        sql, values = self._select_sql('*', conditions, limit)
+        
+        # Each call gets its own cursor name, so overlapping iterations on
+        # one connection don't collide
+        with self.connection.cursor(name=f"cur_{self.name}_{uuid.uuid4().hex}",
+                                    cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = batch
+            cursor.execute(sql, values)
+            for row in cursor:
+                yield dict(row)
+
+    def select_rows(self, conditions: Optional[List[Dict[str, Any]]] = None,
+                    limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream the rows matching conditions, in primary key order."""
+        # Positions are not stable in SQL, so SELECT gets the matching rows
+        # themselves rather than indexes into `rows`
+        return self.iter_rows(conditions, limit)
+    
+    def find_keys(self, conditions: Optional[List[Dict[str, Any]]] = None,
+                  limit: Optional[int] = None) -> list:
+        """Find the primary keys of the rows matching conditions."""
+        # Positions are not stable in SQL, so UPDATE and DELETE address
+        # rows by the keys returned here rather than by index
+        if not self.primary_key:
+            raise SimpleDBException("Updating or deleting rows requires a primary key in Supabase storage")
+        sql, values = self._select_sql(f'"{self.primary_key}"', conditions, limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, values)
+            return [row[0] for row in cursor.fetchall()]
+    
+    def _select_sql(self, select_list: str, conditions: Optional[List[Dict[str, Any]]],
+                    limit: Optional[int]) -> tuple:
+        """Build a SELECT of the rows matching conditions, in primary key order."""
+        sql = f'SELECT {select_list} FROM "{self.name}"'
         values = []
         
         if conditions:
@@ -201,107 +267,93 @@ class SupabaseTable:
         if self.primary_key:
             sql += f' ORDER BY "{self.primary_key}" ASC'
         
-        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(sql, values)
-            count = len(cursor.fetchall())
-            return list(range(count))
+        if limit:
+            sql += ' LIMIT %s'
+            values = list(values) + [limit]
+        return sql, values
 
-    def update_row(self, row_index: int, updates: Dict[str, Any]):
-        """Update a row by its index in the current fetch (simplified for compatibility)."""
-        # This is tricky because indexes are not persistent in SQL.
-        # QueryExecutor calls find_rows, gets indexes, then calls update_row(index, updates).
-        # We need to fetch the row at that index to get its PK, then update it.
-        rows = self.rows
-        if row_index < 0 or row_index >= len(rows):
+    def update_keys(self, pks: list, updates: Dict[str, Any]):
+        """Update the rows with the given primary keys in one statement."""
+        if not pks:
             return
         
-        row = rows[row_index]
-        if not self.primary_key:
-            raise SimpleDBException("Update by index requires a primary key in Supabase storage")
-        
-        pk_val = row[self.primary_key]
-        conditions = [{'column': self.primary_key, 'operator': '=', 'value': pk_val}]
-        
-        # Original update_row logic
-        # Validate updates
+        # Validate updates once for the whole batch (into a new dict -
+        # the caller's may be a cached plan)
+        validated = {}
         for col_name, value in updates.items():
             col = self.get_column(col_name)
             if not col:
                 raise ColumnNotFoundError(f"Column '{col_name}' does not exist")
-            updates[col_name] = self.validate_value(col, value)
+            validated[col_name] = self.validate_value(col, value)
+        updates = validated
         
-        # Build UPDATE query
+        # Build UPDATE query - one statement and one commit for every key
         set_clauses = [f'"{col}" = %s' for col in updates.keys()]
-        where_clause, where_values = self._build_where_clause(conditions)
-        
-        sql = f'UPDATE "{self.name}" SET {", ".join(set_clauses)} WHERE {where_clause}'
-        values = list(updates.values()) + where_values
+        sql = (f'UPDATE "{self.name}" SET {", ".join(set_clauses)} '
+               f'WHERE "{self.primary_key}" = ANY(%s)')
+        values = list(updates.values()) + [list(pks)]
         
-        with self.connection.cursor() as cursor:
-            try:
+        try:
+            with self.connection.cursor() as cursor:
                 cursor.execute(sql, values)
                 self.connection.commit()
-            except psycopg2.IntegrityError as e:
-                self.connection.rollback()
-                if 'duplicate key' in str(e).lower():
-                    raise UniqueConstraintViolation(f"Unique constraint violation: {e}")
-                raise
-
-    def delete_row(self, row_index: int):
-        """Delete a row by its index in the current fetch."""
-        rows = self.rows
-        if row_index < 0 or row_index >= len(rows):
+        except psycopg2.IntegrityError as e:
+            self.connection.rollback()
+            if 'duplicate key' in str(e).lower():
+                raise UniqueConstraintViolation(f"Unique constraint violation: {e}")
+            raise
+    
+    def delete_keys(self, pks: list):
+        """Delete the rows with the given primary keys in one statement."""
+        if not pks:
             return
         
-        row = rows[row_index]
-        if not self.primary_key:
-            raise SimpleDBException("Delete by index requires a primary key in Supabase storage")
-        
-        pk_val = row[self.primary_key]
-        
-        sql = f'DELETE FROM "{self.name}" WHERE "{self.primary_key}" = %s'
+        sql = f'DELETE FROM "{self.name}" WHERE "{self.primary_key}" = ANY(%s)'
         
         with self.connection.cursor() as cursor:
-            cursor.execute(sql, (pk_val,))
+            cursor.execute(sql, (list(pks),))
             self.connection.commit()
-
     
     def _build_where_clause(self, conditions: List[Dict[str, Any]]) -> tuple:
         """Build WHERE clause from conditions."""
         if not conditions:
             return '', []
         
-        clauses = []
-        values = []
-        current_logic = 'AND'
+        # The SQL only depends on the chain's shape, so build it once per
+        # shape and just collect the values on later calls
+        signature = tuple(
+            cond['logic'] if 'logic' in cond else (cond['column'], cond['operator'])
+            for cond in conditions
+        )
+        values = [cond['value'] for cond in conditions if 'logic' not in cond]
+        where_clause = self._where_cache.get(signature)
+        if where_clause is not None:
+            return where_clause, values
         
+        where_clause = None
+        current_logic = 'AND'
         for cond in conditions:
             if 'logic' in cond:
                 current_logic = cond['logic']
                 continue
             
-            column = cond['column']
             operator = cond['operator']
-            value = cond['value']
-            
-            # Map operators
-            op_map = {
-                '=': '=',
-                '!=': '!=',
-                '<': '<',
-                '<=': '<=',
-                '>': '>',
-                '>=': '>='
-            }
-            
-            if operator not in op_map:
+            op_sql = SQL_OPERATORS.get(operator)
+            if op_sql is None:
                 raise DataTypeError(f"Unknown operator: {operator}")
             
-            clauses.append(f'"{column}" {op_map[operator]} %s')
-            values.append(value)
-        
-        # Join with logic operators (simplified - assumes all same logic)
-        where_clause = f' {current_logic} '.join(clauses)
+            column = cond['column']
+            clause = f'"{column}" {op_sql} %s'
+            # Combine left to right like the in-memory engine, so mixed
+            # AND/OR chains group as ((a AND b) OR c) rather than by precedence
+            if where_clause is None:
+                where_clause = clause
+            else:
+                where_clause = f'({where_clause}) {current_logic} {clause}'
+        
+        if len(self._where_cache) >= self.WHERE_CACHE_SIZE:
+            del self._where_cache[next(iter(self._where_cache))]
+        where_clause = self._where_cache[signature] = where_clause or ''
         return where_clause, values
     
     def to_dict(self) -> Dict[str, Any]:
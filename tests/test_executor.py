@@ -5,8 +5,29 @@ Integration tests for query executor.
 import pytest
 import os
 import tempfile
-from simpledb.storage import Database
-from simpledb.executor import QueryExecutor
+from simpledb.storage import Database, Table
+from simpledb.executor import QueryExecutor, RowView
+from simpledb.parser import Parser
+from simpledb.exceptions import TableNotFoundError
+
+
+class KeyedTable(Table):
+    """Table addressed by primary key and selected by row, like remote storage."""
+    
+    def select_rows(self, conditions=None, limit=None):
+        self.keyed.append(('select', limit))
+        return map(self.rows.__getitem__, self.find_rows(conditions, limit))
+    
+    def find_keys(self, conditions=None, limit=None):
+        return [self.rows[i][self.primary_key] for i in self.find_rows(conditions, limit)]
+    
+    def update_keys(self, pks, updates):
+        self.keyed.append(('update', pks))
+        self.update_rows([self.index_lookup(self.primary_key, pk) for pk in pks], updates)
+    
+    def delete_keys(self, pks):
+        self.keyed.append(('delete', pks))
+        self.delete_rows([self.index_lookup(self.primary_key, pk) for pk in pks])
 
 
 class TestExecutor:
@@ -139,3 +160,395 @@ class TestExecutor:
         assert result['success'] is True
         assert len(result['rows']) == 3
         assert result['rows'][0]['name'] == 'Alice'
+    
+    def test_plan_cache_reuses_parsed_statement(self):
+        """Test that repeated SQL reuses the cached plan."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        sql = "SELECT * FROM users;"
+        self.executor.execute(sql)
+        cached = self.executor.prepare(sql)
+        
+        result = self.executor.execute(sql)
+        
+        assert result['success'] is True
+        assert self.executor.prepare(sql) is cached
+        assert self.executor.prepare("  SELECT * FROM users ") is cached
+    
+    def test_plan_cache_cleared_on_ddl(self):
+        """Test that CREATE/DROP flush the plan cache."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("SELECT * FROM users;")
+        assert len(self.executor._plan_cache) > 0
+        
+        self.executor.execute("DROP TABLE users;")
+        
+        assert len(self.executor._plan_cache) == 0
+    
+    def test_inner_join(self):
+        """Test INNER JOIN matches rows on the join columns."""
+        self.executor.execute("CREATE TABLE categories (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("CREATE TABLE tasks (id INT PRIMARY KEY, title VARCHAR(50), category_id INT);")
+        self.executor.execute("INSERT INTO categories VALUES (1, 'Work');")
+        self.executor.execute("INSERT INTO categories VALUES (2, 'Personal');")
+        self.executor.execute("INSERT INTO categories VALUES (3, 'Urgent');")
+        self.executor.execute("DELETE FROM categories WHERE id = 3;")
+        self.executor.execute("INSERT INTO tasks VALUES (1, 'Report', 1);")
+        self.executor.execute("INSERT INTO tasks VALUES (2, 'Groceries', 2);")
+        self.executor.execute("INSERT INTO tasks VALUES (3, 'Taxes', 1);")
+        self.executor.execute("INSERT INTO tasks VALUES (4, 'Orphan', 3);")
+        
+        result = self.executor.execute(
+            "SELECT title, name FROM tasks INNER JOIN categories ON tasks.category_id = categories.id;"
+        )
+        
+        assert result['success'] is True
+        assert result['rows'] == [
+            {'title': 'Report', 'name': 'Work'},
+            {'title': 'Groceries', 'name': 'Personal'},
+            {'title': 'Taxes', 'name': 'Work'},
+        ]
+    
+    def test_inner_join_order_by(self):
+        """Test ORDER BY on a joined query, with NULL keys first and a LIMIT."""
+        self.executor.execute("CREATE TABLE categories (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("CREATE TABLE tasks (id INT PRIMARY KEY, title VARCHAR(50), category_id INT);")
+        self.executor.execute("INSERT INTO categories VALUES (1, 'Work');")
+        self.executor.execute("INSERT INTO tasks VALUES (1, 'Report', 1);")
+        self.executor.execute("INSERT INTO tasks VALUES (2, NULL, 1);")
+        self.executor.execute("INSERT INTO tasks VALUES (3, 'Taxes', 1);")
+        
+        sql = "SELECT id, name FROM tasks INNER JOIN categories ON tasks.category_id = categories.id"
+        result = self.executor.execute(sql + " ORDER BY title;")
+        assert [row['id'] for row in result['rows']] == [2, 1, 3]
+        
+        result = self.executor.execute(sql + " ORDER BY title DESC LIMIT 2;")
+        assert [row['id'] for row in result['rows']] == [3, 1]
+    
+    def test_count(self):
+        """Test COUNT(*) with WHERE and alias."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, age INT);")
+        self.executor.execute("INSERT INTO users VALUES (1, 25);")
+        self.executor.execute("INSERT INTO users VALUES (2, 30);")
+        self.executor.execute("INSERT INTO users VALUES (3, 35);")
+        
+        result = self.executor.execute("SELECT COUNT(*) AS total FROM users WHERE age > 25;")
+        
+        assert result['success'] is True
+        assert result['columns'] == ['total']
+        assert result['rows'] == [{'total': 2}]
+    
+    def test_order_by_with_nulls(self):
+        """Test ORDER BY on an INT column containing NULLs."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, age INT);")
+        self.executor.execute("INSERT INTO users VALUES (1, 30);")
+        self.executor.execute("INSERT INTO users VALUES (2, NULL);")
+        self.executor.execute("INSERT INTO users VALUES (3, 25);")
+        self.executor.execute("INSERT INTO users VALUES (4, 40);")
+        
+        result = self.executor.execute("SELECT id FROM users ORDER BY age ASC;")
+        assert result['success'] is True
+        assert [r['id'] for r in result['rows']] == [2, 3, 1, 4]
+        
+        result = self.executor.execute("SELECT id FROM users ORDER BY age DESC LIMIT 2;")
+        assert result['success'] is True
+        assert [r['id'] for r in result['rows']] == [4, 1]
+    
+    def test_transaction_saves_once(self):
+        """Test that statements inside transaction() are saved once on exit."""
+        saves = []
+        self.db.save = lambda: saves.append(True)
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        saves.clear()
+        
+        with self.executor.transaction():
+            for i in range(10):
+                self.executor.execute(f"INSERT INTO users VALUES ({i}, 'user{i}');")
+            assert saves == []
+        
+        assert len(saves) == 1
+        assert len(self.db.get_table('users').rows) == 10
+    
+    def test_noop_update_skips_save(self):
+        """Test that an UPDATE matching no rows does not save."""
+        saves = []
+        self.db.save = lambda: saves.append(True)
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        saves.clear()
+        
+        result = self.executor.execute("UPDATE users SET name = 'Nobody' WHERE id = 99;")
+        
+        assert result['success'] is True
+        assert saves == []
+    
+    def test_where_plan_orders_indexed_equality_first(self):
+        """Test that AND-chained predicates are planned most selective first."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice', 25);")
+        self.executor.execute("INSERT INTO users VALUES (2, 'Bob', 30);")
+        
+        sql = "SELECT name FROM users WHERE age > 20 AND name != 'Carol' AND id = 2;"
+        result = self.executor.execute(sql)
+        
+        assert result['success'] is True
+        assert result['rows'] == [{'name': 'Bob'}]
+        where = self.executor.prepare(sql)['where']
+        planned = [where['conditions'][step] for step in where['plan_order'] if type(step) is int]
+        assert [c['column'] for c in planned] == ['id', 'age', 'name']
+    
+    def test_inner_join_prefixes_colliding_columns(self):
+        """Test that join-table columns sharing a name get a table prefix."""
+        self.executor.execute("CREATE TABLE categories (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("CREATE TABLE tasks (id INT PRIMARY KEY, title VARCHAR(50), category_id INT);")
+        self.executor.execute("INSERT INTO categories VALUES (7, 'Work');")
+        self.executor.execute("INSERT INTO tasks VALUES (1, 'Report', 7);")
+        
+        result = self.executor.execute(
+            "SELECT * FROM tasks INNER JOIN categories ON tasks.category_id = categories.id;"
+        )
+        
+        assert result['success'] is True
+        row = result['rows'][0]
+        assert row['id'] == 1
+        assert row['categories.id'] == 7
+        assert row['name'] == 'Work'
+    
+    def test_select_with_alias(self):
+        """Test column aliases, including on a repeated (cached) query."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        
+        for _ in range(2):
+            result = self.executor.execute("SELECT id, name AS username FROM users;")
+            
+            assert result['success'] is True
+            assert result['columns'] == ['id', 'username']
+            assert result['rows'] == [{'id': 1, 'username': 'Alice'}]
+    
+    def test_select_unknown_column_is_null(self):
+        """Test that projecting a column the table lacks yields NULL values."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        
+        result = self.executor.execute("SELECT name, nickname FROM users;")
+        
+        assert result['success'] is True
+        assert result['rows'] == [{'name': 'Alice', 'nickname': None}]
+    
+    def test_execute_unchecked_raises(self):
+        """Test that execute_unchecked propagates errors instead of wrapping them."""
+        with pytest.raises(TableNotFoundError):
+            self.executor.execute_unchecked("SELECT * FROM missing;")
+        
+        result = self.executor.execute("SELECT * FROM missing;")
+        assert result['success'] is False
+    
+    def test_select_projection_with_where_and_limit(self):
+        """Test projecting filtered rows with LIMIT and no ORDER BY."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice', 30);")
+        self.executor.execute("INSERT INTO users VALUES (2, 'Bob', 25);")
+        self.executor.execute("INSERT INTO users VALUES (3, 'Charlie', 35);")
+        self.executor.execute("DELETE FROM users WHERE id = 1;")
+        
+        result = self.executor.execute("SELECT name FROM users WHERE age > 20 LIMIT 1;")
+        
+        assert result['success'] is True
+        assert result['rows'] == [{'name': 'Bob'}]
+        assert result['count'] == 1
+    
+    def test_select_result_cached_until_table_changes(self):
+        """Test that a repeated SELECT reuses its result until the table is modified."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        
+        first = self.executor.execute("SELECT name FROM users;")
+        second = self.executor.execute("SELECT name FROM users;")
+        assert second['rows'][0] is first['rows'][0]
+        
+        # Changing a returned result leaves the cached one intact
+        first['rows'].pop()
+        first['columns'].append('extra')
+        third = self.executor.execute("SELECT name FROM users;")
+        assert third['rows'] == [{'name': 'Alice'}]
+        assert third['columns'] == ['name'] and third['count'] == 1
+        
+        columnar = self.executor.execute("SELECT name FROM users;", columnar=True)
+        columnar['data'][0].clear()
+        assert self.executor.execute("SELECT name FROM users;", columnar=True)['data'] == [['Alice']]
+        
+        self.executor.execute("INSERT INTO users VALUES (2, 'Bob');")
+        fourth = self.executor.execute("SELECT name FROM users;")
+        
+        assert fourth['rows'] == [{'name': 'Alice'}, {'name': 'Bob'}]
+    
+    def test_evicted_plan_drops_its_cached_result(self):
+        """Test a SELECT evicted from the plan cache no longer keeps its result."""
+        self.executor.PLAN_CACHE_SIZE = 1
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("SELECT * FROM users;")
+        self.executor.execute("SELECT name FROM users;")
+        
+        assert 'result' not in self.executor.prepare("SELECT * FROM users;")
+    
+    def test_inner_join_projection_reads_owning_table(self):
+        """Test that projected JOIN columns come from the table that owns them."""
+        self.executor.execute("CREATE TABLE categories (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("CREATE TABLE tasks (id INT PRIMARY KEY, title VARCHAR(50), category_id INT);")
+        self.executor.execute("INSERT INTO categories VALUES (7, 'Work');")
+        self.executor.execute("INSERT INTO tasks VALUES (1, 'Report', 7);")
+        
+        result = self.executor.execute(
+            "SELECT id, name AS category, missing FROM tasks INNER JOIN categories ON tasks.category_id = categories.id;"
+        )
+        
+        assert result['success'] is True
+        assert result['columns'] == ['id', 'category', 'missing']
+        assert result['rows'] == [{'id': 1, 'category': 'Work', 'missing': None}]
+    
+    def test_execute_with_parameters(self):
+        """Test executing statement templates with bound ? parameters."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        
+        insert = "INSERT INTO users VALUES (?, ?);"
+        assert self.executor.execute(insert, [1, "O'Brien"])['success'] is True
+        assert self.executor.execute(insert, [2, 'Bob'])['success'] is True
+        self.executor.execute("UPDATE users SET name = ? WHERE id = ?;", ['Robert', 2])
+        
+        result = self.executor.execute("SELECT name FROM users WHERE id > ?;", [0])
+        assert result['rows'] == [{'name': "O'Brien"}, {'name': 'Robert'}]
+        
+        result = self.executor.execute(insert, [3])
+        assert result['success'] is False
+    
+    def test_parameterized_statements_share_template_plans(self):
+        """Test bound statements reuse the template's plans and leave it unchanged."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice', 25);")
+        self.executor.execute("INSERT INTO users VALUES (2, 'Bob', 30);")
+        
+        sql = "SELECT name AS n FROM users WHERE age > ? AND id = ?;"
+        assert self.executor.execute(sql, [20, 2])['rows'] == [{'n': 'Bob'}]
+        assert self.executor.execute(sql, [20, 1])['rows'] == [{'n': 'Alice'}]
+        
+        template = self.executor.parser.compile(sql)([0, 0])['template']
+        assert template['projection'] == [('name', 'n')]
+        assert template['where']['plan_order'] == [2, Parser.LOGIC_MARKERS['AND'], 0]
+        assert 'result' not in template
+    
+    def test_update_and_delete_by_key(self):
+        """Test tables with find_keys are updated and deleted by primary key."""
+        self.db.tables['users'] = KeyedTable('users', [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'name', 'type': 'VARCHAR'}
+        ])
+        table = self.db.tables['users']
+        table.keyed = []
+        table.insert_row({'id': 10, 'name': 'Alice'})
+        table.insert_row({'id': 20, 'name': 'Bob'})
+        
+        result = self.executor.execute("UPDATE users SET name = 'Robert' WHERE id = 20;")
+        assert result['message'] == '1 row(s) updated'
+        result = self.executor.execute("DELETE FROM users WHERE name = 'Alice';")
+        assert result['message'] == '1 row(s) deleted'
+        assert list(table.iter_rows()) == [{'id': 20, 'name': 'Robert'}]
+        assert table.keyed == [('update', [20]), ('delete', [10])]
+    
+    def test_select_uses_rows_from_select_rows(self):
+        """Test tables with select_rows return the matching rows, not a prefix of the table."""
+        self.db.tables['users'] = KeyedTable('users', [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'name', 'type': 'VARCHAR'}
+        ])
+        table = self.db.tables['users']
+        table.keyed = []
+        for i, name in enumerate(['Bob', 'Alice', 'Dave', 'Carol']):
+            table.insert_row({'id': i + 1, 'name': name})
+        
+        result = self.executor.execute("SELECT name FROM users WHERE id > 2;")
+        assert result['rows'] == [{'name': 'Dave'}, {'name': 'Carol'}]
+        result = self.executor.execute("SELECT * FROM users WHERE id > 1 ORDER BY name;")
+        assert [row['name'] for row in result['rows']] == ['Alice', 'Carol', 'Dave']
+        result = self.executor.execute("SELECT COUNT(*) FROM users WHERE name != 'Bob';")
+        assert result['rows'] == [{'count': 3}]
+        assert [call[0] for call in table.keyed] == ['select'] * 3
+    
+    def test_template_plans_cleared_by_ddl(self):
+        """Test a statement template is re-planned after its table is re-created."""
+        sql = "SELECT name FROM users WHERE id = ?;"
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        assert self.executor.execute(sql, [1])['rows'] == [{'name': 'Alice'}]
+        
+        self.executor.execute("DROP TABLE users;")
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY);")
+        self.executor.execute("INSERT INTO users VALUES (1);")
+        assert self.executor.execute(sql, [1])['rows'] == [{'name': None}]
+    
+    def test_execute_many_saves_once(self):
+        """Test that a batch of statements saves once and reports each result."""
+        saves = []
+        self.db.save = lambda: saves.append(True)
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        saves.clear()
+        
+        results = self.executor.execute_many([
+            "INSERT INTO users VALUES (1, 'Alice');",
+            "INSERT INTO users VALUES (1, 'Duplicate');",
+            "INSERT INTO users VALUES (2, 'Bob');",
+        ])
+        
+        assert [result['success'] for result in results] == [True, False, True]
+        assert len(saves) == 1
+        assert len(self.db.get_table('users').rows) == 2
+    
+    def test_select_columnar(self):
+        """Test columnar SELECT output and iterating it through RowView."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        self.executor.execute("INSERT INTO users VALUES (2, 'Bob');")
+        
+        result = self.executor.execute("SELECT name AS n, id FROM users ORDER BY id DESC;", columnar=True)
+        assert result['columns'] == ['n', 'id']
+        assert result['data'] == [['Bob', 'Alice'], [2, 1]]
+        assert result['count'] == 2
+        
+        view = RowView(result['columns'], result['data'])
+        assert len(view) == 2
+        assert view[1] == {'n': 'Alice', 'id': 1}
+        assert list(view) == self.executor.execute("SELECT name AS n, id FROM users ORDER BY id DESC;")['rows']
+        
+        result = self.executor.execute("SELECT COUNT(*) FROM users;", columnar=True)
+        assert result['data'] == [[2]]
+    
+    def test_execute_batch_insert(self):
+        """Test inserting rows from one INSERT template as a single batch."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50));")
+        saves = []
+        self.db.save = lambda: saves.append(True)
+        
+        sql = "INSERT INTO users (id, name) VALUES (?, ?);"
+        result = self.executor.execute_batch_insert(sql, [(1, 'Alice'), (2, 'Bob')])
+        assert result['success'] is True
+        assert len(saves) == 1
+        
+        # A failing row leaves the whole batch out
+        result = self.executor.execute_batch_insert(sql, [(3, 'Carol'), (1, 'Duplicate')])
+        assert result['success'] is False
+        rows = self.executor.execute("SELECT name FROM users ORDER BY id;")['rows']
+        assert rows == [{'name': 'Alice'}, {'name': 'Bob'}]
+    
+    def test_insert_on_conflict_do_nothing(self):
+        """Test INSERT ... ON CONFLICT DO NOTHING skips rows with taken keys."""
+        self.executor.execute("CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(50) UNIQUE);")
+        self.executor.execute("INSERT INTO users VALUES (1, 'Alice');")
+        
+        result = self.executor.execute("INSERT INTO users VALUES (1, 'Other') ON CONFLICT DO NOTHING;")
+        assert result == {'success': True, 'message': '0 rows inserted'}
+        
+        result = self.executor.execute_batch_insert(
+            "INSERT INTO users VALUES (?, ?) ON CONFLICT DO NOTHING;",
+            [(2, 'Alice'), (3, 'Carol'), (1, 'Dave')]
+        )
+        assert result['message'] == '1 row(s) inserted'
+        rows = self.executor.execute("SELECT * FROM users ORDER BY id;")['rows']
+        assert rows == [{'id': 1, 'name': 'Alice'}, {'id': 3, 'name': 'Carol'}]
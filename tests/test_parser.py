@@ -83,6 +83,15 @@ class TestParser:
         assert result['command'] == 'SELECT'
         assert result['limit'] == 10
     
+    def test_select_count(self):
+        """Test SELECT COUNT(*) is tagged as an aggregate."""
+        result = self.parser.parse("SELECT count(*) AS total FROM users;")
+        
+        assert result['columns'] == ['COUNT(*) AS total']
+        assert result['is_count'] is True
+        assert result['count_alias'] == 'total'
+        assert 'is_count' not in self.parser.parse("SELECT * FROM users;")
+    
     def test_update(self):
         """Test UPDATE parsing."""
         sql = "UPDATE users SET name = 'Charlie' WHERE id = 1;"
@@ -119,3 +128,63 @@ class TestParser:
         """Test that empty SQL raises ParseError."""
         with pytest.raises(ParseError):
             self.parser.parse("")
+    
+    def test_insert_literals(self):
+        """Test strings, negative and decimal numbers, booleans and NULL as values."""
+        sql = "INSERT INTO t VALUES ('Alice', -3, 2.5, TRUE, false, NULL);"
+        result = self.parser.parse(sql)
+        
+        assert result['values'] == ['Alice', -3, 2.5, True, False, None]
+    
+    def test_unterminated_string(self):
+        """Test that an unterminated string raises ParseError."""
+        with pytest.raises(ParseError):
+            self.parser.parse("SELECT * FROM users WHERE name = 'Alice;")
+    
+    def test_where_chain_and_missing_value(self):
+        """Test AND/OR chains in WHERE and a clause cut off before its value."""
+        result = self.parser.parse("SELECT * FROM users WHERE age > 18 AND name != 'Bob' OR id = NULL;")
+        
+        assert result['where']['conditions'] == [
+            {'column': 'age', 'operator': '>', 'value': 18},
+            {'logic': 'AND'},
+            {'column': 'name', 'operator': '!=', 'value': 'Bob'},
+            {'logic': 'OR'},
+            {'column': 'id', 'operator': '=', 'value': None},
+        ]
+        
+        with pytest.raises(ParseError):
+            self.parser.parse("SELECT * FROM users WHERE age >;")
+    
+    def test_unknown_command_reported_before_scanning(self):
+        """Test that an unknown leading keyword is reported before the rest is tokenized."""
+        with pytest.raises(ParseError, match="Unknown command: ORDER"):
+            self.parser.parse("ORDER BY 'unterminated")
+        
+        tokens = self.parser.tokenizer.tokenize_iter("SELECT * FROM users WHERE name = 'x")
+        assert next(tokens).value == 'SELECT'
+    
+    def test_compile_with_parameters(self):
+        """Test compiling a statement template and binding ? parameters."""
+        bound = self.parser.compile("SELECT name FROM users WHERE id = ? AND age > ?;")
+        
+        result = bound([1, 18])
+        assert result['where']['conditions'][0]['value'] == 1
+        assert result['where']['conditions'][2]['value'] == 18
+        assert bound([2, 30]) is not result
+        assert result['columns'] is result['template']['columns']
+        value = object()
+        assert bound([value, 1])['where']['conditions'][0]['value'] is value
+        assert self.parser.compile("SELECT name FROM users WHERE id = ? AND age > ?;") is bound
+        
+        with pytest.raises(ParseError):
+            bound([1])
+        with pytest.raises(ParseError):
+            self.parser.parse("SELECT name FROM users WHERE id = ?;")
+    
+    def test_truncated_value_lists(self):
+        """Test that statements ending where a value is expected raise ParseError."""
+        with pytest.raises(ParseError):
+            self.parser.parse("INSERT INTO users VALUES (")
+        with pytest.raises(ParseError):
+            self.parser.parse("UPDATE users SET name =")
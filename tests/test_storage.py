@@ -5,10 +5,11 @@ Unit tests for storage engine.
 import pytest
 import os
 import tempfile
+from simpledb import storage
 from simpledb.storage import Database, Table
 from simpledb.exceptions import (
     PrimaryKeyViolation, UniqueConstraintViolation,
-    NotNullViolation, TableNotFoundError
+    NotNullViolation, TableNotFoundError, DataTypeError
 )
 
 
@@ -76,6 +77,55 @@ class TestTable:
         with pytest.raises(NotNullViolation):
             table.insert_row({'id': 1, 'name': None})
     
+    def test_insert_checks_name_the_violated_column(self):
+        """Test the precompiled insert checks report the failing column."""
+        table = Table('users', [{'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']}])
+        with pytest.raises(NotNullViolation, match="'id'"):
+            table.insert_row({})
+        
+        table = Table('users', [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'email', 'type': 'VARCHAR', 'constraints': ['UNIQUE', 'NOT NULL']}
+        ])
+        with pytest.raises(NotNullViolation, match="'email'"):
+            table.insert_row({'id': 1})
+        table.insert_row({'id': 1, 'email': 'a@x.com'})
+        with pytest.raises(UniqueConstraintViolation, match='email'):
+            table.insert_row({'id': 2, 'email': 'a@x.com'})
+        assert len(table.rows) == 1
+    
+    def test_validate_value_conversions(self):
+        """Test INT and BOOLEAN values are converted from their string forms."""
+        table = Table('flags', [
+            {'name': 'id', 'type': 'INT'},
+            {'name': 'active', 'type': 'BOOLEAN'}
+        ])
+        int_col, bool_col = table.columns
+        
+        assert table.validate_value(int_col, 7) == 7
+        assert table.validate_value(int_col, '42') == 42
+        assert table.validate_value(int_col, True) is True
+        assert table.validate_value(int_col, None) is None
+        for text in ('TRUE', 'true', 'Yes', '1'):
+            assert table.validate_value(bool_col, text) is True
+        for text in ('FALSE', 'no', 'No', '0'):
+            assert table.validate_value(bool_col, text) is False
+        with pytest.raises(DataTypeError):
+            table.validate_value(bool_col, 'maybe')
+    
+    def test_indexed_varchar_keys_are_interned(self):
+        """Test UNIQUE VARCHAR values share one string between row and index."""
+        table = Table('users', [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'email', 'type': 'VARCHAR', 'constraints': ['UNIQUE']}
+        ])
+        email = ''.join(['a@', 'x.com'])
+        table.insert_row({'id': 1, 'email': email})
+        
+        stored = table.rows[0]['email']
+        assert stored is next(iter(table.indexes['email']))
+        assert stored is table.validate_value(table.columns[1], ''.join(['a@', 'x.com']))
+    
     def test_update_row(self):
         """Test row update."""
         columns = [
@@ -89,6 +139,47 @@ class TestTable:
         
         assert table.rows[0]['name'] == 'Alice Smith'
     
+    def test_update_row_constraint_violation_keeps_row(self):
+        """Test a rejected update leaves the row and earlier snapshots untouched."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'email', 'type': 'VARCHAR', 'constraints': ['UNIQUE', 'NOT NULL']}
+        ]
+        table = Table('users', columns)
+        table.insert_row({'id': 1, 'email': 'a@x.com'})
+        table.insert_row({'id': 2, 'email': 'b@x.com'})
+        snapshot = table.rows[1]
+        
+        with pytest.raises(PrimaryKeyViolation):
+            table.update_row(1, {'id': 1})
+        with pytest.raises(UniqueConstraintViolation):
+            table.update_row(1, {'email': 'a@x.com'})
+        with pytest.raises(NotNullViolation):
+            table.update_row(1, {'email': None})
+        assert table.rows[1] == {'id': 2, 'email': 'b@x.com'}
+        
+        table.update_row(1, {'email': 'c@x.com'})
+        assert snapshot['email'] == 'b@x.com'
+        assert table.rows[1]['email'] == 'c@x.com'
+    
+    def test_update_row_moves_changed_index_entries(self):
+        """Test updates keep indexes correct for changed and untouched columns."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'email', 'type': 'VARCHAR', 'constraints': ['UNIQUE']},
+            {'name': 'name', 'type': 'VARCHAR'}
+        ]
+        table = Table('users', columns)
+        table.insert_row({'id': 1, 'email': 'a@x.com', 'name': 'Alice'})
+        
+        table.update_row(0, {'name': 'Alicia', 'email': 'a@x.com'})
+        assert table.index_lookup('id', 1) == 0
+        assert table.index_lookup('email', 'a@x.com') == 0
+        
+        table.update_row(0, {'email': 'alice@x.com'})
+        assert table.index_lookup('email', 'a@x.com') is None
+        assert table.index_lookup('email', 'alice@x.com') == 0
+    
     def test_delete_row(self):
         """Test row deletion."""
         columns = [
@@ -102,6 +193,46 @@ class TestTable:
         
         assert table.rows[0] is None
     
+    def test_where_literals_cast_to_column_type(self):
+        """Test WHERE literals are converted like inserted values."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'code', 'type': 'VARCHAR'},
+            {'name': 'active', 'type': 'BOOLEAN'}
+        ]
+        table = Table('items', columns)
+        table.insert_row({'id': 1, 'code': '7', 'active': True})
+        table.insert_row({'id': 2, 'code': '8', 'active': False})
+        
+        assert table.find_rows([{'column': 'id', 'operator': '=', 'value': '2'}]) == [1]
+        assert table.find_rows([{'column': 'code', 'operator': '=', 'value': 7}]) == [0]
+        assert table.find_rows([{'column': 'active', 'operator': '=', 'value': 'false'}]) == [1]
+        assert table.find_rows([{'column': 'id', 'operator': '>', 'value': 1.5}]) == [1]
+        assert table.find_rows([{'column': 'id', 'operator': '=', 'value': 'x'}]) == []
+    
+    def test_deletes_compact_row_slots(self):
+        """Test that enough deletes drop the empty slots and renumber the indexes."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'email', 'type': 'VARCHAR', 'constraints': ['UNIQUE']}
+        ]
+        table = Table('users', columns)
+        table.COMPACT_MIN_DELETED = 2
+        for i in range(8):
+            table.insert_row({'id': i, 'email': f'{i}@x.com'})
+        
+        table.delete_row(1)
+        assert table.rows[1] is None
+        table.delete_row(3)
+        
+        assert [row['id'] for row in table.rows] == [0, 2, 4, 5, 6, 7]
+        assert table.index_lookup('email', '4@x.com') == 2
+        assert table.find_rows([{'column': 'id', 'operator': '>=', 'value': 6}]) == [4, 5]
+        assert table.sort_row_indexes(table.find_rows(), 'id', reverse=True, limit=2) == [5, 4]
+        with pytest.raises(UniqueConstraintViolation):
+            table.insert_row({'id': 8, 'email': '2@x.com'})
+        assert table.insert_row({'id': 8, 'email': '8@x.com'}) == 6
+    
     def test_find_rows(self):
         """Test finding rows with conditions."""
         columns = [
@@ -118,6 +249,278 @@ class TestTable:
         indexes = table.find_rows(conditions)
         
         assert len(indexes) == 2
+    
+    def test_find_rows_and_chain_uses_index(self):
+        """Test AND-chained conditions led by a primary key equality."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        
+        table.insert_row({'id': 1, 'age': 25})
+        table.insert_row({'id': 2, 'age': 30})
+        
+        def find(value, age):
+            return table.find_rows([
+                {'column': 'id', 'operator': '=', 'value': value},
+                {'logic': 'AND'},
+                {'column': 'age', 'operator': '>=', 'value': age}
+            ])
+        
+        assert find(2, 30) == [1]
+        assert find(2, 31) == []
+        assert find(3, 0) == []
+        
+        # The indexed equality is used wherever it appears in the chain
+        table._scan_columns = lambda *args: pytest.fail("scanned instead of probing the index")
+        assert table.find_rows([
+            {'column': 'age', 'operator': '<', 'value': 30},
+            {'logic': 'AND'},
+            {'column': 'id', 'operator': '=', 'value': 1}
+        ]) == [0]
+        assert table.find_rows([{'column': 'id', 'operator': '=', 'value': 2}]) == [1]
+
+    
+    def test_find_rows_column_scan(self):
+        """Test column-wise scans skip NULLs and see rows changed since the last scan."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        
+        table.insert_row({'id': 1, 'age': 25})
+        table.insert_row({'id': 2, 'age': None})
+        table.insert_row({'id': 3, 'age': 40})
+        conditions = [{'column': 'age', 'operator': '>', 'value': 20}]
+        
+        assert table.find_rows(conditions) == [0, 2]
+        
+        table.delete_row(0)
+        table.update_row(1, {'age': 30})
+        
+        assert table.find_rows(conditions) == [1, 2]
+    
+    def test_bulk_update_and_delete(self):
+        """Test updating and deleting several rows at once."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'status', 'type': 'VARCHAR', 'length': 20}
+        ]
+        table = Table('tasks', columns)
+        for i in range(1, 5):
+            table.insert_row({'id': i, 'status': 'pending'})
+        
+        table.update_rows([0, 2], {'status': 'done'})
+        table.delete_rows([1, 3])
+        
+        assert [row and row['status'] for row in table.rows] == ['done', None, 'done', None]
+        assert table.indexes['id'] == {1: 0, 3: 2}
+    
+    def test_find_rows_compiles_repeated_or_chain(self):
+        """Test a repeated AND/OR chain is compiled and still matches the same rows."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        for i, age in enumerate([25, None, 40, 18]):
+            table.insert_row({'id': i + 1, 'age': age})
+        
+        conditions = [
+            {'column': 'age', 'operator': '<', 'value': 20},
+            {'logic': 'OR'},
+            {'column': 'age', 'operator': '>', 'value': 30},
+            {'logic': 'AND'},
+            {'column': 'id', 'operator': '!=', 'value': 4}
+        ]
+        
+        results = [table.find_rows(conditions, limit=10) for _ in range(Table.PREDICATE_COMPILE_THRESHOLD + 1)]
+        
+        assert all(result == [2] for result in results)
+        assert any(callable(entry) for entry in table._predicates.values())
+        
+        # Without a limit the chain is evaluated as column masks
+        assert table.find_rows(conditions) == [2]
+
+    def test_compiled_or_chains_are_keyed_by_shape(self):
+        """Test compiled scans ignore literals and the cache stays bounded."""
+        columns = [
+            {'name': 'a', 'type': 'INT'},
+            {'name': 'b', 'type': 'INT'}
+        ]
+        table = Table('t', columns)
+        for i in range(10):
+            table.insert_row({'a': i, 'b': i * 2})
+
+        def chain(*values):
+            conditions = []
+            for value in values:
+                if conditions:
+                    conditions.append({'logic': 'OR'})
+                conditions.append({'column': 'a', 'operator': '=', 'value': value})
+            return conditions
+
+        # One shape with a different literal each time shares one entry
+        for i in range(100):
+            assert table.find_rows(chain(i % 10, 20), limit=1) == [i % 10]
+        assert len(table._predicates) == 1
+        assert callable(next(iter(table._predicates.values())))
+
+        # Many distinct shapes never grow past the bound
+        for length in range(1, Table.PREDICATE_CACHE_SIZE * 2):
+            conditions = chain(*range(length))
+            conditions += [{'logic': 'OR'}, {'column': 'b', 'operator': '>', 'value': 0}]
+            table.find_rows(conditions, limit=1)
+        assert len(table._predicates) <= Table.PREDICATE_CACHE_SIZE
+    
+    def test_evaluate_conditions_short_circuit_keeps_left_fold(self):
+        """Test skipped conditions never change how a mixed chain combines."""
+        columns = [
+            {'name': 'a', 'type': 'INT'},
+            {'name': 'b', 'type': 'INT'},
+            {'name': 'c', 'type': 'INT'}
+        ]
+        table = Table('t', columns)
+        chain = [
+            {'column': 'a', 'operator': '=', 'value': 1},
+            {'logic': 'AND'},
+            {'column': 'b', 'operator': '=', 'value': 1},
+            {'logic': 'OR'},
+            {'column': 'c', 'operator': '=', 'value': 1},
+            {'logic': 'AND'},
+            {'column': 'a', 'operator': '>', 'value': 0}
+        ]
+        
+        # ((a AND b) OR c) AND a > 0
+        assert table._evaluate_conditions({'a': 0, 'b': 1, 'c': 1}, chain) is False
+        assert table._evaluate_conditions({'a': 2, 'b': 0, 'c': 1}, chain) is True
+        assert table._evaluate_conditions({'a': 1, 'b': 1, 'c': 0}, chain) is True
+        assert table._evaluate_conditions({'a': 2, 'b': 1, 'c': 0}, chain) is False
+    
+    def test_find_rows_limit(self):
+        """Test that find_rows stops after `limit` matches."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        for i in range(10):
+            table.insert_row({'id': i, 'age': i % 2})
+        
+        assert table.find_rows(None, limit=3) == [0, 1, 2]
+        assert table.find_rows([{'column': 'age', 'operator': '=', 'value': 1}], limit=2) == [1, 3]
+        assert table.find_rows([
+            {'column': 'age', 'operator': '=', 'value': 0},
+            {'logic': 'OR'},
+            {'column': 'id', 'operator': '>', 'value': 6}
+        ], limit=4) == [0, 2, 4, 6]
+    
+    def test_column_vectors_follow_inserts_and_updates(self):
+        """Test scans stay correct when inserts and updates patch the cached columns."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        table.insert_row({'id': 1, 'age': 25})
+        table.insert_row({'id': 2, 'age': 35})
+        older = [{'column': 'age', 'operator': '>', 'value': 30}]
+        assert table.find_rows(older) == [1]
+        
+        table.insert_row({'id': 3, 'age': 50})
+        table.insert_row({'id': 4, 'age': None})
+        table.update_row(0, {'age': 60})
+        table.update_row(1, {'age': None})
+        
+        assert table.find_rows(older) == [0, 2]
+        assert table.find_rows([{'column': 'age', 'operator': '<', 'value': 70}]) == [0, 2]
+        
+        table.delete_rows([0, 3])
+        table.insert_row({'id': 5, 'age': 45})
+        assert table.find_rows(older) == [2, 4]
+        assert table.find_rows(None) == [1, 2, 4]
+    
+    def test_sort_row_indexes(self):
+        """Test ordering row indexes by a column, with NULLs first and top-K limits."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'age', 'type': 'INT'}
+        ]
+        table = Table('users', columns)
+        for i, age in enumerate([30, None, 25, 40, 25]):
+            table.insert_row({'id': i, 'age': age})
+        table.delete_row(3)
+        everything = table.find_rows()
+        
+        assert table.sort_row_indexes(everything, 'age') == [1, 2, 4, 0]
+        assert table.sort_row_indexes(everything, 'age', reverse=True) == [0, 2, 4, 1]
+        assert table.sort_row_indexes(everything, 'age', limit=2) == [1, 2]
+        assert table.sort_row_indexes([0, 2, 4], 'age', reverse=True, limit=2) == [0, 2]
+        assert table.sort_row_indexes(everything, 'missing') == everything
+    
+    def test_row_keys_are_interned_column_names(self):
+        """Test that every row dict shares the interned column name keys."""
+        name = ''.join(['user', '_name'])
+        table = Table('users', [{'name': name, 'type': 'VARCHAR'}])
+        table.insert_row({'user_name': 'Alice'})
+        table.update_row(0, {'user_name': 'Bob'})
+        
+        other = Table('other', [{'name': ''.join(['user', '_name']), 'type': 'VARCHAR'}])
+        key, = table.rows[0]
+        assert key is other.column_names[0]
+    
+    def test_sort_by_primary_key_uses_ordered_index(self):
+        """Test that ORDER BY the primary key follows inserts, updates and deletes."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'name', 'type': 'VARCHAR'}
+        ]
+        table = Table('users', columns)
+        for i in [3, 1, 4, 2]:
+            table.insert_row({'id': i, 'name': f'user{i}'})
+        table.update_row(2, {'id': 0})
+        table.delete_row(0)
+        everything = table.find_rows()
+        
+        assert table.sort_row_indexes(everything, 'id') == [2, 1, 3]
+        assert table.sort_row_indexes(everything, 'id', reverse=True, limit=2) == [3, 1]
+        assert table.sort_row_indexes([1, 2], 'id', reverse=True) == [1, 2]
+    
+    def test_iter_rows_skips_deleted(self):
+        """Test iter_rows yields only live rows."""
+        columns = [{'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']}]
+        table = Table('users', columns)
+        for i in range(3):
+            table.insert_row({'id': i})
+        table.delete_row(1)
+        
+        assert [row['id'] for row in table.iter_rows()] == [0, 2]
+
+    
+    def test_to_dict_round_trip(self):
+        """Test tables serialize column by column and load both layouts."""
+        columns = [
+            {'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']},
+            {'name': 'name', 'type': 'VARCHAR'}
+        ]
+        table = Table('users', columns)
+        table.insert_row({'id': 1, 'name': 'Alice'})
+        table.insert_row({'id': 2, 'name': 'Bob'})
+        table.insert_row({'id': 3, 'name': None})
+        table.delete_row(1)
+        
+        data = table.to_dict()
+        assert data['data'] == {'id': [1, 3], 'name': ['Alice', None]}
+        
+        loaded = Table.from_dict(data)
+        assert loaded.rows == [{'id': 1, 'name': 'Alice'}, {'id': 3, 'name': None}]
+        assert loaded.index_lookup('id', 3) == 1
+        
+        legacy = Table.from_dict({'name': 'users', 'columns': columns,
+                                  'rows': [{'id': 1, 'name': 'Alice'}]})
+        assert legacy.rows == [{'id': 1, 'name': 'Alice'}]
 
 
 class TestDatabase:
@@ -187,3 +590,60 @@ class TestDatabase:
         finally:
             if os.path.exists(db_file):
                 os.unlink(db_file)
+    
+    def test_persistence_without_orjson(self, monkeypatch):
+        """Test the standard json fallback reads files and writes the same bytes."""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
+            db_file = f.name
+        
+        try:
+            db = Database(db_file)
+            db.create_table('users', [{'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']}])
+            db.get_table('users').insert_row({'id': 1})
+            db.save()
+            with open(db_file, 'rb') as f:
+                saved = f.read()
+            
+            monkeypatch.setattr(storage, 'orjson', None)
+            db2 = Database(db_file)
+            assert db2.get_table('users').rows == [{'id': 1}]
+            db2.save()
+            with open(db_file, 'rb') as f:
+                assert f.read() == saved
+        
+        finally:
+            if os.path.exists(db_file):
+                os.unlink(db_file)
+    
+    def test_save_reserializes_only_changed_tables(self):
+        """Test save reuses cached JSON for tables that did not change."""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
+            db_file = f.name
+        
+        try:
+            db = Database(db_file)
+            columns = [{'name': 'id', 'type': 'INT', 'constraints': ['PRIMARY KEY']}]
+            db.create_table('users', columns)
+            db.create_table('tasks', columns)
+            db.get_table('users').insert_row({'id': 1})
+            db.save()
+            tasks_blob = db._table_json['tasks'][2]
+            
+            db.get_table('users').insert_row({'id': 2})
+            db.drop_table('tasks')
+            db.create_table('tasks', columns)
+            db.get_table('tasks').insert_row({'id': 7})
+            db.save()
+            assert db._table_json['tasks'][2] is not tasks_blob
+            
+            users_blob = db._table_json['users'][2]
+            db.save()
+            assert db._table_json['users'][2] is users_blob
+            
+            db2 = Database(db_file)
+            assert [row['id'] for row in db2.get_table('users').rows] == [1, 2]
+            assert [row['id'] for row in db2.get_table('tasks').rows] == [7]
+        
+        finally:
+            if os.path.exists(db_file):
+                os.unlink(db_file)
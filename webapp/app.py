@@ -6,6 +6,8 @@ A task management app with CRUD operations.
 
 import os
 import sys
+import threading
+import time
 from flask import Flask, render_template, request, jsonify
 from dotenv import load_dotenv
 
@@ -18,6 +20,8 @@ else:
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from simpledb.exceptions import PrimaryKeyViolation
+
 # Initialize Flask
 app = Flask(__name__)
 
@@ -26,12 +30,61 @@ db = None
 executor = None
 db_error = None
 db_initialized = False
+_init_lock = threading.Lock()
+
+# Statement templates - parsed once, then only bound to each request's values
+INSERT_TASK_SQL = "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?);"
+DELETE_TASK_SQL = "DELETE FROM tasks WHERE id = ?;"
+
+# Next task ID, handed out from memory instead of querying per insert
+_next_task_id = 1
+_next_id_lock = threading.Lock()
+
+
+def sync_next_task_id():
+    """Move the task ID counter past the highest ID in the tasks table."""
+    global _next_task_id
+    result = executor.execute("SELECT id FROM tasks ORDER BY id DESC LIMIT 1;")
+    next_free = 1
+    if result['success'] and result['rows']:
+        next_free = result['rows'][0]['id'] + 1
+    # Never move backwards - other threads may already hold higher IDs
+    with _next_id_lock:
+        _next_task_id = max(_next_task_id, next_free)
+
+
+# (epoch second, formatted local time) of the last timestamp handed out
+_timestamp = (0, '')
+
+
+def now_timestamp():
+    """Format the current local time, reusing the string within the same second."""
+    global _timestamp
+    second = int(time.time())
+    cached = _timestamp
+    if cached[0] != second:
+        # Replaced as one tuple so concurrent requests never see a mixed pair
+        cached = _timestamp = (second, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second)))
+    return cached[1]
+
+
+def reserve_task_id():
+    """Take the next task ID from the counter."""
+    global _next_task_id
+    with _next_id_lock:
+        next_id = _next_task_id
+        _next_task_id += 1
+    return next_id
+
 
 def init_db():
+    with _init_lock:
+        if not db_initialized:
+            _init_db()
+
+
+def _init_db():
     global db, executor, db_error, db_initialized
-    if db_initialized:
-        return
-    
     try:
         from simpledb.supabase_storage import SupabaseDatabase
         from simpledb.executor import QueryExecutor
@@ -58,12 +111,12 @@ def init_db():
                 );
             """)
             
-            # Check if categories already seeded
-            cat_check = executor.execute("SELECT COUNT(*) as count FROM categories;")
-            if cat_check['success'] and cat_check['rows'][0]['count'] == 0:
-                executor.execute("INSERT INTO categories (id, name) VALUES (1, 'Work');")
-                executor.execute("INSERT INTO categories (id, name) VALUES (2, 'Personal');")
-                executor.execute("INSERT INTO categories (id, name) VALUES (3, 'Urgent');")
+            # Seed categories - rows already present are skipped, so no
+            # read is needed first and concurrent cold starts can't clash
+            executor.execute_batch_insert(
+                "INSERT INTO categories (id, name) VALUES (?, ?) ON CONFLICT DO NOTHING;",
+                [(1, 'Work'), (2, 'Personal'), (3, 'Urgent')]
+            )
         except Exception as e:
             print(f"Error initializing categories/schema: {e}")
 
@@ -79,6 +132,7 @@ def init_db():
                     category_id INT
                 );
             """)
+            sync_next_task_id()
         except Exception as e:
             print(f"Error initializing tasks: {e}")
 
@@ -88,9 +142,10 @@ def init_db():
         db_error = str(e)
         db_initialized = True # Mark as "tried" even if failed
 
-@app.before_request
-def ensure_db():
-    init_db()
+
+# Connect once at import (each serverless cold start) rather than
+# checking on every request
+init_db()
 
 
 @app.route('/')
@@ -124,39 +179,40 @@ def create_task():
         
     data = request.json
     
-    # Get next ID
-    result = executor.execute("SELECT id FROM tasks ORDER BY id DESC LIMIT 1;")
-    next_id = 1
-    if result['success'] and result['rows']:
-        next_id = result['rows'][0]['id'] + 1
-    
     # Insert task
-    title = data.get('title', '').replace("'", "''")
-    description = data.get('description', '').replace("'", "''")
+    title = data.get('title', '')
+    description = data.get('description', '')
     status = data.get('status', 'pending')
     category_id = data.get('category_id', 1) # Default to 1 (Work)
     
-    from datetime import datetime
-    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    created_at = now_timestamp()
     
-    sql = f"""
-        INSERT INTO tasks VALUES (
-            {next_id},
-            '{title}',
-            '{description}',
-            '{status}',
-            '{created_at}',
-            {category_id}
-        );
-    """
+    def insert_task(next_id):
+        return executor.execute_unchecked(
+            INSERT_TASK_SQL,
+            [next_id, title, description, status, created_at, category_id]
+        )
     
-    result = executor.execute(sql)
+    def insert_with_retry():
+        next_id = reserve_task_id()
+        try:
+            result = insert_task(next_id)
+        except PrimaryKeyViolation:
+            # Tasks inserted elsewhere (e.g. through /api/query) can take the
+            # counter's ID - resync from the table and try once more
+            sync_next_task_id()
+            next_id = reserve_task_id()
+            result = insert_task(next_id)
+        return {**result, 'id': next_id}
+    
+    # Any other error gets the same failed result as executor.execute()
+    result = executor.result_or_error(insert_with_retry)
     
     if result['success']:
         return jsonify({
             'success': True,
             'message': 'Task created',
-            'id': next_id
+            'id': result['id']
         })
     else:
         return jsonify(result), 400
@@ -170,22 +226,16 @@ def update_task(task_id):
         
     data = request.json
     
-    updates = []
-    if 'title' in data:
-        title = data['title'].replace("'", "''")
-        updates.append(f"title = '{title}'")
-    if 'description' in data:
-        description = data['description'].replace("'", "''")
-        updates.append(f"description = '{description}'")
-    if 'status' in data:
-        updates.append(f"status = '{data['status']}'")
+    # Only a handful of column combinations exist, so each SET list is a
+    # template parsed once
+    columns = [col for col in ('title', 'description', 'status') if col in data]
     
-    if not updates:
+    if not columns:
         return jsonify({'success': False, 'error': 'No updates provided'}), 400
     
-    sql = f"UPDATE tasks SET {', '.join(updates)} WHERE id = {task_id};"
+    sql = f"UPDATE tasks SET {', '.join(f'{col} = ?' for col in columns)} WHERE id = ?;"
     
-    result = executor.execute(sql)
+    result = executor.execute(sql, [data[col] for col in columns] + [task_id])
     
     if result['success']:
         return jsonify({
@@ -202,9 +252,7 @@ def delete_task(task_id):
     if not executor:
         return jsonify({'success': False, 'error': f'Database not connected: {db_error}'}), 503
         
-    sql = f"DELETE FROM tasks WHERE id = {task_id};"
-    
-    result = executor.execute(sql)
+    result = executor.execute(DELETE_TASK_SQL, [task_id])
     
     if result['success']:
         return jsonify({